@@ -0,0 +1,146 @@
+"""
+Compare the cost and savings of compressing result payloads.
+
+Run from the codelab directory: `python scripts/bench_compression.py`.
+A task with 50 test case results is serialized to about 500 KiB of JSON and
+compressed at each gzip level. The end to end time of a poll is estimated as
+compression + transfer + decompression at the given network bandwidths.
+"""
+
+import gzip
+import random
+import timeit
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from src.core.responses import ResponseSerializer
+from src.sandbox.schemas import TaskPublicSchema
+from src.schemas import DatabaseExecutionResult, TaskStatus
+
+RESULTS_PER_TASK = 50
+OUTPUT_SIZE_PER_RESULT = 10 * 1024
+LEVELS = (1, 3, 5, 6, 9)
+BANDWIDTHS_MBIT = (5, 20, 50, 100)
+ROUNDS = 20
+
+
+def _build_output(rng: random.Random) -> str:
+    """Build program output alike text, numbers and words over many short lines."""
+
+    words = [
+        "result",
+        "case",
+        "sum",
+        "value",
+        "ok",
+        "error",
+        "expected",
+        "got",
+        "index",
+    ]
+    lines = []
+    size = 0
+    while size < OUTPUT_SIZE_PER_RESULT:
+        line = " ".join(
+            rng.choice(words) if rng.random() < 0.5 else str(rng.randint(0, 100_000))
+            for _ in range(rng.randint(2, 8))
+        )
+        lines.append(line)
+        size += len(line) + 1
+
+    return "\n".join(lines)
+
+
+def _build_payload() -> bytes:
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    task = TaskPublicSchema(
+        id=uuid.uuid4(),
+        celery_task_id=str(uuid.uuid4()),
+        entry_file_path="main.py",
+        exercise_id=uuid.uuid4(),
+        session_id=uuid.uuid4(),
+        student_id=uuid.uuid4(),
+        group_id=None,
+        status=TaskStatus.executed,
+        created_at=now,
+        updated_at=now,
+        execution_logs=[],
+        results=[
+            DatabaseExecutionResult(
+                test_case_id=str(uuid.uuid4()),
+                std_in=None,
+                exit_code=0,
+                expended_time=0.125,
+                std_out=_build_output(rng),
+                std_err="",
+                state="success",
+                failed_execution=False,
+                failed_compilation=False,
+            )
+            for _ in range(RESULTS_PER_TASK)
+        ],
+    )
+    return ResponseSerializer(TaskPublicSchema).dump_json(task)
+
+
+def _transfer_ms(size: int, bandwidth_mbit: float) -> float:
+    return size * 8 / (bandwidth_mbit * 1_000_000) * 1000
+
+
+def main() -> None:
+    payload = _build_payload()
+    print(f"payload {len(payload) / 1024:.0f} KiB\n")
+
+    header = " ".join(f"{f'{bandwidth} Mbit/s':>12}" for bandwidth in BANDWIDTHS_MBIT)
+    print(
+        f"{'level':<6} {'size':>9} {'ratio':>6} {'compress':>9} {'decompress':>11} {header}"
+    )
+
+    uncompressed = " ".join(
+        f"{_transfer_ms(len(payload), bandwidth):10.1f}ms"
+        for bandwidth in BANDWIDTHS_MBIT
+    )
+    print(
+        f"{'none':<6} {len(payload) / 1024:7.0f}Ki {1:6.1f} {0:7.2f}ms {0:9.2f}ms {uncompressed}"
+    )
+
+    for level in LEVELS:
+        compressed = gzip.compress(payload, compresslevel=level)
+        compress_ms = (
+            min(
+                timeit.repeat(
+                    lambda level=level: gzip.compress(payload, compresslevel=level),
+                    number=ROUNDS,
+                    repeat=3,
+                )
+            )
+            / ROUNDS
+            * 1000
+        )
+        # browsers decompress with zlib as well
+        decompress_ms = (
+            min(
+                timeit.repeat(
+                    lambda compressed=compressed: zlib.decompress(compressed, wbits=31),
+                    number=ROUNDS,
+                    repeat=3,
+                )
+            )
+            / ROUNDS
+            * 1000
+        )
+
+        totals = " ".join(
+            f"{compress_ms + decompress_ms + _transfer_ms(len(compressed), bandwidth):10.1f}ms"
+            for bandwidth in BANDWIDTHS_MBIT
+        )
+        print(
+            f"{level:<6} {len(compressed) / 1024:7.0f}Ki {len(payload) / len(compressed):6.1f} "
+            f"{compress_ms:7.2f}ms {decompress_ms:9.2f}ms {totals}"
+        )
+
+
+if __name__ == "__main__":
+    main()
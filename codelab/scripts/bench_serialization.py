@@ -0,0 +1,130 @@
+"""
+Compare the cost of serializing result heavy responses.
+
+Run from the codelab directory: `python scripts/bench_serialization.py`.
+Each payload holds tasks with 50 test case results, they are serialized with
+FastAPI's default response pipeline, with `ResponseSerializer` and, when it
+is installed, with orjson over a `model_dump`.
+"""
+
+import asyncio
+import timeit
+import uuid
+from collections.abc import Callable
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.core.pagination import CursorPage
+from src.core.responses import ResponseSerializer
+from src.sandbox.schemas import TaskPublicSchema
+from src.schemas import DatabaseExecutionResult, TaskStatus
+
+RESULTS_PER_TASK = 50
+TASKS_PER_PAGE = 25
+ROUNDS = 200
+
+
+def _build_task() -> TaskPublicSchema:
+    now = datetime.now(timezone.utc)
+    return TaskPublicSchema(
+        id=uuid.uuid4(),
+        celery_task_id=str(uuid.uuid4()),
+        entry_file_path="main.py",
+        exercise_id=uuid.uuid4(),
+        session_id=uuid.uuid4(),
+        student_id=uuid.uuid4(),
+        group_id=None,
+        status=TaskStatus.executed,
+        created_at=now,
+        updated_at=now,
+        execution_logs=[
+            {"message": f"Running test case {index}", "at": now.isoformat()}
+            for index in range(RESULTS_PER_TASK)
+        ],
+        results=[
+            DatabaseExecutionResult(
+                test_case_id=str(uuid.uuid4()),
+                std_in="1 2 3\n" * 4,
+                exit_code=0,
+                expended_time=0.125,
+                std_out=f"test case {index} output\n" * 20,
+                std_err="",
+                state="success",
+                failed_execution=False,
+                failed_compilation=False,
+            )
+            for index in range(RESULTS_PER_TASK)
+        ],
+    )
+
+
+def _fastapi_default(
+    type_: Any, content: Any, exclude_unset: bool
+) -> Callable[[], bytes]:
+    field = create_model_field(name="Response", type_=type_, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def serialize() -> bytes:
+        data = loop.run_until_complete(
+            serialize_response(
+                field=field, response_content=content, exclude_unset=exclude_unset
+            )
+        )
+        return JSONResponse(data).body
+
+    return serialize
+
+
+def _orjson(content: Any, exclude_unset: bool) -> Callable[[], bytes] | None:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    return lambda: orjson.dumps(content.model_dump(exclude_unset=exclude_unset))
+
+
+def main() -> None:
+    task = _build_task()
+    payloads = {
+        f"task with {RESULTS_PER_TASK} results": (TaskPublicSchema, task, False),
+        f"page of {TASKS_PER_PAGE} tasks": (
+            CursorPage[TaskPublicSchema],
+            CursorPage[TaskPublicSchema](
+                items=[_build_task() for _ in range(TASKS_PER_PAGE)], next_cursor=None
+            ),
+            True,
+        ),
+    }
+
+    for name, (type_, content, exclude_unset) in payloads.items():
+        # the serializer is compiled once per route, keep that out of the timings
+        precompiled = ResponseSerializer(type_, exclude_unset=exclude_unset)
+        serializers = {
+            "fastapi default": _fastapi_default(type_, content, exclude_unset),
+            "ResponseSerializer": partial(precompiled.dump_json, content),
+            "orjson (model_dump)": _orjson(content, exclude_unset),
+        }
+
+        size = len(precompiled.dump_json(content))
+        print(f"{name} ({size / 1024:.0f} KiB)")
+        baseline = None
+        for serializer_name, serialize in serializers.items():
+            if serialize is None:
+                print(f"  {serializer_name:<22} skipped, not installed")
+                continue
+
+            per_call = min(timeit.repeat(serialize, number=ROUNDS, repeat=3)) / ROUNDS
+            baseline = baseline or per_call
+            print(
+                f"  {serializer_name:<22} {per_call * 1000:8.3f}ms  x{baseline / per_call:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
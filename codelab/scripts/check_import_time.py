@@ -0,0 +1,110 @@
+"""
+Check that the api starts without the worker stack and within an import time budget.
+
+As the api sends tasks by name, it also checks that those tasks are routed to
+their queue without the task modules being imported.
+
+Run from the codelab directory: `python scripts/check_import_time.py`.
+The budget in milliseconds can be changed with `IMPORT_TIME_BUDGET_MS`.
+"""
+
+import os
+import subprocess
+import sys
+
+# run from the codelab directory, make `src` importable as it is in the subprocess
+sys.path.insert(0, os.getcwd())
+
+MODULE = "src.main"
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 3000))
+
+# the api sends tasks by name, these are only imported by the workers
+FORBIDDEN_MODULES = (
+    "docker",
+    "celery",
+    "src.worker",
+    "src.events.tasks",
+    "src.events.handlers",
+    "src.sandbox.tasks",
+    "src.sandbox.manager",
+    "src.sandbox.executor",
+    "src.sandbox.ochestator",
+)
+
+
+def _import_times() -> dict[str, int]:
+    """Import the api in a fresh interpreter and get the cumulative import time of each module in us."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        times[module.strip()] = int(cumulative)
+
+    return times
+
+
+def _check_task_routes() -> list[str]:
+    """Check that tasks sent by name are routed to the execution queue."""
+
+    from src.core.config import settings
+    from src.worker import EXECUTION_QUEUE_TASKS, celery_app
+
+    errors = []
+    for name in EXECUTION_QUEUE_TASKS:
+        route = celery_app.amqp.router.route({}, name, args=(), kwargs={})
+        if route["queue"].name != settings.CELERY_EXECUTION_QUEUE:
+            errors.append(
+                f"{name} is routed to {route['queue'].name}, "
+                f"expected {settings.CELERY_EXECUTION_QUEUE}"
+            )
+
+    return errors
+
+
+def main() -> int:
+    times = _import_times()
+    errors = _check_task_routes()
+
+    imported = [
+        name
+        for name in FORBIDDEN_MODULES
+        if any(module == name or module.startswith(f"{name}.") for module in times)
+    ]
+    if imported:
+        errors.append(f"{MODULE} imports worker modules: {', '.join(imported)}")
+
+    total_ms = times[MODULE] / 1000
+    if total_ms > BUDGET_MS:
+        errors.append(
+            f"{MODULE} took {total_ms:.0f}ms to import, the budget is {BUDGET_MS:.0f}ms"
+        )
+
+    slowest = sorted(
+        (module for module in times if module.startswith("src.")),
+        key=times.__getitem__,
+        reverse=True,
+    )[:10]
+    print(
+        f"{MODULE} imported in {total_ms:.0f}ms (budget {BUDGET_MS:.0f}ms), slowest modules:"
+    )
+    for module in slowest:
+        print(f"  {times[module] / 1000:8.1f}ms  {module}")
+
+    for error in errors:
+        print(f"error: {error}", file=sys.stderr)
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
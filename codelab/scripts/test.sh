@@ -3,6 +3,7 @@
 set -e
 set -x
 
+python scripts/check_import_time.py
 coverage run --source=src -m pytest
 coverage report --show-missing
 coverage html --title "${@-coverage}"
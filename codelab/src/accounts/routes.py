@@ -18,6 +18,7 @@ from src.accounts.services import (
     list_admin_profile_service,
     update_admin_profile_service,
 )
+from src.core.pagination import CursorPage
 from src.models import Admin
 
 
@@ -51,14 +52,14 @@ async def get_admin_profile(
 
 @router.get(
     "/admins",
-    response_model=list[AdminProfileSchema],
+    response_model=CursorPage[AdminProfileSchema],
     summary="List admin profiles",
 )
 async def list_admin_profiles(
-    admins: Annotated[list[Admin], Depends(list_admin_profile_service)],
-) -> list[AdminProfileSchema]:
+    admins: Annotated[CursorPage[AdminProfileSchema], Depends(list_admin_profile_service)],
+) -> CursorPage[AdminProfileSchema]:
     """List all admin profiles."""
-    return [AdminProfileSchema.model_validate(admin) for admin in admins]
+    return admins
 
 
 @router.patch(
@@ -2,31 +2,51 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import Depends, Body, Path, status
-from sqlmodel import Session, col, func, select, update
+from sqlmodel import col, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.dependecies import (
     require_db_session, 
     require_super_admin_or_anonymous,
     require_super_admin,
     require_admin,
+    invalidate_principal,
 )
+from src.core.cache import TTLCache
+from src.core.config import settings
 from src.core.exceptions import APIException
+from src.core.pagination import (
+    CursorPage,
+    PaginationParams,
+    paginate,
+    project_columns,
+    require_pagination_params,
+)
 from src.core.schemas import APIErrorCodes
 from src.models import (
     Admin, 
     Session as WorkflowSession, 
     SessionEnrollment,
-    Student, 
-    Exercise, 
     ExerciseSubmission,
 )
-from src.accounts.schemas import AdminDashboardSchema, CreateAdminSchema, UpdateAdminSchema
+from src.accounts.schemas import (
+    AdminDashboardSchema,
+    AdminProfileSchema,
+    CreateAdminSchema,
+    UpdateAdminSchema,
+)
 from src.core.security import get_password_hash, verify_password
 from src.schemas import SessionStatus
 
 
-def _create_admin(
-    db_session: Session, 
+# dashboards are refreshed often, serve the counts from a short lived cache per admin
+dashboard_cache = TTLCache(
+    maxsize=settings.ADMIN_DASHBOARD_CACHE_MAX_SIZE,
+    ttl=settings.ADMIN_DASHBOARD_CACHE_TTL_SECONDS,
+)
+
+async def _create_admin(
+    db_session: AsyncSession,
     admin_data: CreateAdminSchema,
     is_super_admin: bool = False,
     admin: Admin | None = None,
@@ -34,9 +54,9 @@ def _create_admin(
     """Create a new admin."""
 
     # check if admin already exists
-    admin = db_session.exec(
+    admin = (await db_session.exec(
         select(Admin).where(col(Admin.email) == admin_data.email.lower())
-    ).first()
+    )).first()
 
     if admin:
         raise APIException(
@@ -56,22 +76,22 @@ def _create_admin(
     )
 
 
-def create_admin_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def create_admin_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin_data: Annotated[CreateAdminSchema, Body()],
     admin: Annotated[Admin | None, Depends(require_super_admin_or_anonymous)],
 ) -> Admin:
     """Create a new admin."""
     if not admin:
         # check that this is the first admin, if not, return an error
-        if db_session.exec(select(Admin)).first() is None:
+        if (await db_session.exec(select(Admin))).first() is None:
             raise APIException(
                 message="You are not authorized to access this resource.",
                 error_code=APIErrorCodes.FORBIDDEN,
                 status_code=status.HTTP_403_FORBIDDEN,
             )
 
-    return _create_admin(
+    return await _create_admin(
         db_session, 
         admin_data, 
         admin=admin,
@@ -79,24 +99,28 @@ def create_admin_service(
     )
 
 
-def get_admin_profile_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_admin_profile_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
 ) -> Admin:
     """Get the admin profile."""
     return admin
 
 
-def list_admin_profile_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def list_admin_profile_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_super_admin)],
-) -> list[Admin]:
+    pagination: Annotated[PaginationParams, Depends(require_pagination_params)],
+) -> CursorPage[AdminProfileSchema]:
     """List the admin profile."""
-    return db_session.exec(select(Admin)).all()
 
+    # only select the profile columns, never the password hashes
+    columns = project_columns(Admin, AdminProfileSchema)
+    return await paginate(db_session, select(*columns), Admin, AdminProfileSchema, pagination)
 
-def update_admin_profile_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+
+async def update_admin_profile_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     admin_data: Annotated[UpdateAdminSchema, Body()],
 ) -> Admin:
@@ -118,20 +142,24 @@ def update_admin_profile_service(
         update_data["password"] = get_password_hash(admin_data.new_password)
 
     # update admin profile
-    db_session.exec(
+    await db_session.exec(
         update(Admin).where(col(Admin.id) == admin.id).values(**update_data)
     )
-    db_session.commit()
+    await db_session.commit()
+    invalidate_principal(admin.id)
+
+    # the bulk update does not touch `admin`, which may be a cached copy
+    admin.sqlmodel_update(update_data)
     return admin
 
 
-def get_admin_public_profile_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_admin_public_profile_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     _: Annotated[Admin, Depends(require_super_admin)],
     user_id: Annotated[UUID, Path()],
 ) -> Admin:
     """Get the admin public profile."""
-    admin = db_session.exec(select(Admin).where(col(Admin.id) == user_id)).first()
+    admin = (await db_session.exec(select(Admin).where(col(Admin.id) == user_id))).first()
 
     if not admin:
         raise APIException(
@@ -143,32 +171,46 @@ def get_admin_public_profile_service(
     return admin
 
 
-def get_admin_dashboard_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_admin_dashboard_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
 ) -> AdminDashboardSchema:
     """Get the admin dashboard."""
-    return AdminDashboardSchema(
-        total_sessions=db_session.exec(
+
+    cached_dashboard = dashboard_cache.get(admin.id)
+    if cached_dashboard is not None:
+        return cached_dashboard
+
+    admin_session_ids = (
+        select(col(WorkflowSession.id))
+        .where(col(WorkflowSession.admin_id) == admin.id)
+    )
+
+    # compute all the counts in a single round trip, enrollments and submissions
+    # are filtered on their session id so no joins are needed.
+    counts = (await db_session.exec(
+        select(
             select(func.count(col(WorkflowSession.id)))
             .where(col(WorkflowSession.admin_id) == admin.id)
-        ).one(),
-        total_active_sessions=db_session.exec(
+            .scalar_subquery(),
             select(func.count(col(WorkflowSession.id)))
             .where(col(WorkflowSession.admin_id) == admin.id)
             .where(col(WorkflowSession.status) == SessionStatus.ongoing)
-        ).one(),
-        total_students=db_session.exec(
-            select(func.count(col(Student.id)))
-            .join(SessionEnrollment, col(SessionEnrollment.student_id) == col(Student.id))
-            .join(WorkflowSession, col(WorkflowSession.id) == col(SessionEnrollment.session_id))
-            .where(col(WorkflowSession.admin_id) == admin.id)
-        ).one(),
-        submitted_assignments=db_session.exec(
+            .scalar_subquery(),
+            select(func.count(col(SessionEnrollment.student_id)))
+            .where(col(SessionEnrollment.session_id).in_(admin_session_ids))
+            .scalar_subquery(),
             select(func.count(col(ExerciseSubmission.id)))
-            .join(Exercise, col(Exercise.id) == col(ExerciseSubmission.exercise_id))
-            .join(WorkflowSession, col(WorkflowSession.id) == col(Exercise.session_id))
-            .where(col(WorkflowSession.admin_id) == admin.id)
-        ).one(),
-    )
+            .where(col(ExerciseSubmission.session_id).in_(admin_session_ids))
+            .scalar_subquery(),
+        )
+    )).one()
 
+    dashboard = AdminDashboardSchema(
+        total_sessions=counts[0],
+        total_active_sessions=counts[1],
+        total_students=counts[2],
+        submitted_assignments=counts[3],
+    )
+    dashboard_cache.set(admin.id, dashboard)
+    return dashboard
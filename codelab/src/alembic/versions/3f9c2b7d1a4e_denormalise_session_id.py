@@ -0,0 +1,67 @@
+"""Denormalise session_id onto task and exercisesubmission
+
+Revision ID: 3f9c2b7d1a4e
+Revises:
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = "3f9c2b7d1a4e"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+TABLES = ("task", "exercisesubmission")
+
+
+def _existing_tables() -> set[str]:
+    # databases created from the SQLModel metadata already have these columns
+    # so only alter the tables that exist and are missing them.
+    inspector = sa.inspect(op.get_bind())
+    return {
+        table
+        for table in TABLES
+        if inspector.has_table(table)
+        and "session_id"
+        not in {column["name"] for column in inspector.get_columns(table)}
+    }
+
+
+def upgrade():
+    for table in _existing_tables():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("session_id", sa.Uuid(), nullable=True))
+            batch_op.create_foreign_key(
+                f"fk_{table}_session_id_session", "session", ["session_id"], ["id"]
+            )
+            batch_op.create_index(
+                f"ix_{table}_session_id_status", ["session_id", "status"]
+            )
+
+        # backfill from the owning exercise
+        op.execute(
+            f"UPDATE {table} SET session_id = ("
+            f"SELECT exercise.session_id FROM exercise WHERE exercise.id = {table}.exercise_id"
+            ") WHERE session_id IS NULL"
+        )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index(f"ix_{table}_session_id_status")
+            batch_op.drop_constraint(
+                f"fk_{table}_session_id_session", type_="foreignkey"
+            )
+            batch_op.drop_column("session_id")
@@ -0,0 +1,70 @@
+"""Add base image pull policy and digest to languageimage
+
+Revision ID: 8b1e4d6a2c70
+Revises: 3f9c2b7d1a4e
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = "8b1e4d6a2c70"
+down_revision = "3f9c2b7d1a4e"
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = ("base_image_pull_policy", "base_image_digest")
+
+
+def _existing_columns() -> set[str] | None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("languageimage"):
+        return None
+
+    return {column["name"] for column in inspector.get_columns("languageimage")}
+
+
+def upgrade():
+    columns = _existing_columns()
+    if columns is None:
+        return
+
+    with op.batch_alter_table("languageimage") as batch_op:
+        if "base_image_pull_policy" not in columns:
+            batch_op.add_column(
+                sa.Column(
+                    "base_image_pull_policy",
+                    sa.Enum(
+                        "always",
+                        "if_not_present",
+                        "if_digest_changed",
+                        name="imagepullpolicy",
+                    ),
+                    nullable=False,
+                    server_default="if_not_present",
+                )
+            )
+        if "base_image_digest" not in columns:
+            batch_op.add_column(
+                sa.Column(
+                    "base_image_digest",
+                    sqlmodel.sql.sqltypes.AutoString(),
+                    nullable=True,
+                )
+            )
+
+
+def downgrade():
+    columns = _existing_columns()
+    if columns is None:
+        return
+
+    with op.batch_alter_table("languageimage") as batch_op:
+        for column in COLUMNS:
+            if column in columns:
+                batch_op.drop_column(column)
@@ -0,0 +1,41 @@
+"""Drop build_logs from languageimage, build logs are stored as files
+
+Revision ID: c4a7e2f9d813
+Revises: 8b1e4d6a2c70
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c4a7e2f9d813"
+down_revision = "8b1e4d6a2c70"
+branch_labels = None
+depends_on = None
+
+
+def _has_build_logs() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return inspector.has_table("languageimage") and "build_logs" in {
+        column["name"] for column in inspector.get_columns("languageimage")
+    }
+
+
+def upgrade():
+    if not _has_build_logs():
+        return
+
+    with op.batch_alter_table("languageimage") as batch_op:
+        batch_op.drop_column("build_logs")
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("languageimage") or _has_build_logs():
+        return
+
+    with op.batch_alter_table("languageimage") as batch_op:
+        batch_op.add_column(sa.Column("build_logs", sa.JSON(), nullable=True))
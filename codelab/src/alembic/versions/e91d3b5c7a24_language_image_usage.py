@@ -0,0 +1,55 @@
+"""Add usage statistics to languageimage
+
+Revision ID: e91d3b5c7a24
+Revises: c4a7e2f9d813
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e91d3b5c7a24"
+down_revision = "c4a7e2f9d813"
+branch_labels = None
+depends_on = None
+
+
+def _existing_columns() -> set[str] | None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("languageimage"):
+        return None
+
+    return {column["name"] for column in inspector.get_columns("languageimage")}
+
+
+def upgrade():
+    columns = _existing_columns()
+    if columns is None:
+        return
+
+    with op.batch_alter_table("languageimage") as batch_op:
+        if "last_used_at" not in columns:
+            batch_op.add_column(sa.Column("last_used_at", sa.DateTime(), nullable=True))
+            batch_op.create_index("ix_languageimage_last_used_at", ["last_used_at"])
+        if "execution_count" not in columns:
+            batch_op.add_column(
+                sa.Column(
+                    "execution_count", sa.Integer(), nullable=False, server_default="0"
+                )
+            )
+
+
+def downgrade():
+    columns = _existing_columns()
+    if columns is None:
+        return
+
+    with op.batch_alter_table("languageimage") as batch_op:
+        if "last_used_at" in columns:
+            batch_op.drop_index("ix_languageimage_last_used_at")
+            batch_op.drop_column("last_used_at")
+        if "execution_count" in columns:
+            batch_op.drop_column("execution_count")
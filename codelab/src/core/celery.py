@@ -0,0 +1,28 @@
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from celery import Celery
+    from celery.result import AsyncResult
+
+
+def get_celery_app() -> "Celery":
+    """
+    Get the celery app of the workers.
+
+    The api only sends tasks by name, celery is imported on first use and the
+    worker task modules are never imported by the api.
+    """
+
+    from src.worker import celery_app
+
+    return celery_app
+
+
+def send_task(name: str, **options: Any) -> "AsyncResult":
+    """Send the task registered under name to the workers."""
+    return get_celery_app().send_task(name, **options)
+
+
+def revoke_task(task_id: str, terminate: bool = False) -> None:
+    """Revoke a sent task, terminating its process if it already started and `terminate` is set."""
+    get_celery_app().control.revoke(task_id, terminate=terminate)
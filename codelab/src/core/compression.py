@@ -0,0 +1,153 @@
+import gzip
+import zlib
+from collections.abc import Callable
+
+from fastapi import Request
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+
+# scope key holding the compression options of the matched route
+COMPRESSION_SCOPE_KEY = "codelab.compression"
+
+# streams are sent as they are produced, compressing them would buffer events
+SKIPPED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class CompressionOptions(BaseModel):
+    # responses smaller than this are sent as is, None disables compression
+    minimum_size: int | None
+    compresslevel: int
+
+
+def compression(
+    minimum_size: int | None = settings.RESPONSE_COMPRESSION_MIN_SIZE,
+    compresslevel: int = settings.RESPONSE_COMPRESSION_LEVEL,
+) -> Callable[[Request], None]:
+    """
+    Get a route dependency overriding how the responses of the route are compressed.
+
+    Pass `minimum_size=None` to never compress the responses of the route.
+    """
+
+    options = CompressionOptions(minimum_size=minimum_size, compresslevel=compresslevel)
+
+    def set_compression_options(request: Request) -> None:
+        request.scope[COMPRESSION_SCOPE_KEY] = options
+
+    return set_compression_options
+
+
+class CompressionMiddleware:
+    """
+    Gzip responses larger than a minimum size for clients accepting it.
+
+    The options are read once the response starts, after routing, so routes can
+    override them with the `compression` dependency. Event streams and responses
+    that are already encoded are never compressed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int) -> None:
+        self.app = app
+        self.default_options = CompressionOptions(
+            minimum_size=minimum_size, compresslevel=compresslevel
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get(
+            "accept-encoding", ""
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        responder = _GZipResponder(scope, send, self.default_options)
+        await self.app(scope, receive, responder.send)
+
+
+class _GZipResponder:
+    """Compresses the response of a single request."""
+
+    def __init__(
+        self, scope: Scope, send: Send, default_options: CompressionOptions
+    ) -> None:
+        self.scope = scope
+        self._send = send
+        self.default_options = default_options
+
+        self._start_message: Message | None = None
+        self._compressor: zlib._Compress | None = None
+        self._passthrough = False
+
+    def _should_compress(
+        self, headers: MutableHeaders, body: bytes, more_body: bool
+    ) -> bool:
+        options: CompressionOptions = self.scope.get(
+            COMPRESSION_SCOPE_KEY, self.default_options
+        )
+        if options.minimum_size is None:
+            return False
+
+        if "content-encoding" in headers or headers.get("content-type", "").startswith(
+            SKIPPED_CONTENT_TYPES
+        ):
+            return False
+
+        if more_body:
+            # streamed bodies are compressed unless they declare a small size
+            content_length = headers.get("content-length")
+            return content_length is None or int(content_length) >= options.minimum_size
+
+        return len(body) >= options.minimum_size
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # held back until the first body chunk tells if it is worth compressing
+            self._start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+
+        if self._compressor is None:
+            assert self._start_message is not None
+            headers = MutableHeaders(raw=self._start_message["headers"])
+
+            if not self._should_compress(headers, body, more_body):
+                self._passthrough = True
+                await self._send(self._start_message)
+                await self._send(message)
+                return
+
+            options: CompressionOptions = self.scope.get(
+                COMPRESSION_SCOPE_KEY, self.default_options
+            )
+            headers["Content-Encoding"] = "gzip"
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                # the whole body is known, compress it in one go
+                body = gzip.compress(body, compresslevel=options.compresslevel)
+                headers["Content-Length"] = str(len(body))
+                await self._send(self._start_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["Content-Length"]
+            self._compressor = zlib.compressobj(
+                options.compresslevel, zlib.DEFLATED, 31
+            )
+            await self._send(self._start_message)
+
+        chunk = self._compressor.compress(body)
+        if not more_body:
+            chunk += self._compressor.flush()
+
+        await self._send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
@@ -71,12 +71,100 @@ class Settings(BaseSettings):
         )
         return f"sqlite://{path}"
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        return self.SQLALCHEMY_DATABASE_URI.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+    # list endpoints page size
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
+
+    # execution outputs larger than this (in bytes) are moved to the blob store
+    EXECUTION_OUTPUT_INLINE_LIMIT: int = 4 * 1024
+    EXECUTION_OUTPUT_MAX_READ_SIZE: int = 256 * 1024
+
+    # resolved admins and students are cached in-process by the auth dependencies
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+
+    # enrollment imports resolve and insert students in chunks of this size
+    ENROLLMENT_IMPORT_CHUNK_SIZE: int = 500
+
+    # admin dashboard counts are cached in-process per admin
+    ADMIN_DASHBOARD_CACHE_TTL_SECONDS: float = 30
+    ADMIN_DASHBOARD_CACHE_MAX_SIZE: int = 256
+
     # Celery settings
     CELERY_BROKER_URL: str = "redis://localhost:6379"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379"
     CELERY_DEFAULT_QUEUE: str
     CELERY_EXECUTION_QUEUE: str
 
+    # Redis used for locks shared between the api and the workers
+    REDIS_URL: str = "redis://localhost:6379"
+
+    # workers publish a heartbeat to Redis, the health check reads it instead
+    # of pinging the workers. The deep health check still pings them.
+    WORKER_HEARTBEAT_INTERVAL_SECONDS: float = 10
+    WORKER_HEARTBEAT_TTL_SECONDS: float = 30
+    HEALTH_CHECK_CACHE_TTL_SECONDS: float = 2
+    HEALTH_CHECK_PING_TIMEOUT_SECONDS: float = 1
+
+    # language images are built in parallel up to this limit, a single image
+    # is never built twice at once. Locks are renewed while held and expire
+    # after the timeout in case a worker dies while holding them.
+    MAX_CONCURRENT_IMAGE_BUILDS: int = 2
+    IMAGE_BUILD_LOCK_TIMEOUT_SECONDS: int = 5 * 60
+    IMAGE_BUILD_RETRY_DELAY_SECONDS: int = 30
+
+    # images claimed for a build (status created) that did not start building
+    # within this time are scheduled for a rebuild again. Kept below the time
+    # executions wait for an evicted image so they can take over a lost claim.
+    IMAGE_BUILD_CLAIM_TIMEOUT_SECONDS: int = 5 * 60
+
+    # scheduled image actions handled per run, removals run concurrently
+    SCHEDULED_IMAGE_ACTIONS_BATCH_SIZE: int = 100
+    SCHEDULED_IMAGE_REMOVAL_CONCURRENCY: int = 4
+
+    # least recently used images that no upcoming or ongoing session uses are
+    # evicted once the language images take more disk space than the budget.
+    # Executions on an evicted image wait for it to be rebuilt.
+    LANGUAGE_IMAGE_DISK_BUDGET_BYTES: int = 20 * 1024 * 1024 * 1024
+    EVICTED_IMAGE_REBUILD_MAX_RETRIES: int = 20
+
+    # execution event streams send keep-alives while idle and are closed after
+    # the max duration, clients reconnect to continue.
+    EXECUTION_EVENTS_KEEPALIVE_SECONDS: float = 15
+    EXECUTION_EVENTS_MAX_STREAM_SECONDS: float = 10 * 60
+
+    # output of running programs is published live at most once per interval,
+    # up to the max size per request.
+    EXECUTION_OUTPUT_STREAM_INTERVAL_SECONDS: float = 0.25
+    EXECUTION_OUTPUT_STREAM_MAX_SIZE: int = 64 * 1024
+
+    # task / submission views are written through to Redis by the worker and
+    # the api, entries expire so missed updates are eventually refreshed.
+    EXECUTION_VIEW_CACHE_TTL_SECONDS: int = 30 * 60
+    # longest a read may wait for a task / submission to change
+    EXECUTION_VIEW_MAX_WAIT_SECONDS: float = 30
+
+    # token buckets of execution requests per student and session, each bucket
+    # holds up to the burst and refills at the given rate.
+    TASK_EXECUTION_RATE_LIMIT_BURST: int = 5
+    TASK_EXECUTION_RATE_LIMIT_REFILL_PER_SECOND: float = 0.2
+    SUBMISSION_RATE_LIMIT_BURST: int = 3
+    SUBMISSION_RATE_LIMIT_REFILL_PER_SECOND: float = 0.05
+
+    # responses above the minimum size are gzipped, level 1 gave the lowest
+    # end to end time for result payloads (see scripts/bench_compression.py).
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+    RESPONSE_COMPRESSION_LEVEL: int = 1
+
+    # build logs are streamed to a file per image, output past the limit is dropped
+    IMAGE_BUILD_LOG_MAX_SIZE: int = 1024 * 1024
+    IMAGE_BUILD_LOG_MAX_READ_SIZE: int = 256 * 1024
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
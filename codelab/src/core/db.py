@@ -1,13 +1,18 @@
 import logging
 
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select
 
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# the sync engine is used by the celery workers, migrations and scripts
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
 
+# the async engine is used by the API so requests are served on the event loop
+async_engine = create_async_engine(str(settings.SQLALCHEMY_ASYNC_DATABASE_URI))
+
 
 # make sure all SQLModel models are imported (src.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
@@ -1,29 +1,81 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator
 from typing import Annotated
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 import jwt
-from sqlmodel import Session, select
+from sqlalchemy import event
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.core.db import engine
+from src.core.cache import TTLCache
+from src.core.db import async_engine
 from src.core.exceptions import APIException
-from src.core.schemas import APIErrorCodes
+from src.core.schemas import APIErrorCodes, UserKeyClaims, UserRole
 from src.core.security import SECURITY_HEADER, verify_api_key, ALGORITHM
 from passlib.context import CryptContext
 from src.core.config import settings
 from src.models import Admin, Student
 
 
+# resolved admins and students keyed by user id, this lets most authenticated
+# requests skip the auth queries entirely.
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
 
-def require_db_session() -> Generator[Session, None, None]:
+
+def invalidate_principal(user_id: UUID | str) -> None:
+    """Remove a cached admin or student, must be called when the user changes."""
+    principal_cache.delete(str(user_id))
+
+
+@event.listens_for(Admin, "after_update")
+@event.listens_for(Admin, "after_delete")
+@event.listens_for(Student, "after_update")
+@event.listens_for(Student, "after_delete")
+def _invalidate_changed_principal(_mapper, _connection, target: Admin | Student) -> None:  # type: ignore
+    # covers users changed through the ORM in this process e.g deactivation,
+    # bulk `update` statements must call `invalidate_principal` themselves.
+    invalidate_principal(target.id)
+
+
+async def _get_principal(
+    db_session: AsyncSession,
+    model: type[Admin] | type[Student],
+    user_id: UUID,
+) -> Admin | Student | None:
+    """Get the active admin or student with the given id, from the cache when possible."""
+
+    cached = principal_cache.get(str(user_id))
+    if cached is not None:
+        cached_model, data = cached
+        # build a new instance for each request so cached state is never shared
+        return cached_model.model_validate(data) if cached_model is model else None
+
+    statement = select(model).where(model.id == user_id)
+    if model is Admin:
+        statement = statement.where(Admin.is_active == True)
+
+    user = (await db_session.exec(statement)).first()
+    if user:
+        principal_cache.set(str(user_id), (model, user.model_dump()))
+
+    return user
+
+
+async def require_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Get a new database db_session."""
 
-    with Session(engine) as db_session:
+    # objects are returned to the response after commits, so do not expire them
+    # as refreshing them lazily is not possible on an async session.
+    async with AsyncSession(async_engine, expire_on_commit=False) as db_session:
         yield db_session
 
 
-def require_authenticated_service(
+async def require_authenticated_service(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(SECURITY_HEADER)],
 ) -> bool:
     """Check if the provided API key is valid."""
@@ -37,10 +89,10 @@ def require_authenticated_service(
     return True
 
 
-def require_authenticated_user_key(
+async def require_user_key_claims(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(SECURITY_HEADER)],
-) -> str:
-    """Check if the provided user key is valid."""
+) -> UserKeyClaims:
+    """Check if the provided user key is valid and return its claims."""
 
     try:
         payload = jwt.decode(
@@ -51,13 +103,13 @@ def require_authenticated_user_key(
         )
 
         assert isinstance(payload, dict)
-        return payload["sub"]
+        return UserKeyClaims(user_id=payload["sub"], role=payload.get("role"))
     except jwt.ExpiredSignatureError:
         raise APIException(
             message="User key has expired.",
             error_code=APIErrorCodes.AUTHENTICATION_FAILED,
         )
-    except (jwt.PyJWTError, AssertionError):
+    except (jwt.PyJWTError, AssertionError, ValueError):
         raise APIException(
             message="Invalid token.",
             error_code=APIErrorCodes.AUTHENTICATION_FAILED,
@@ -65,19 +117,23 @@ def require_authenticated_user_key(
         )
 
 
-def require_admin(
-    db_session: Annotated[Session, Depends(require_db_session)],
-    user_id: Annotated[str, Depends(require_authenticated_user_key)],
-) -> bool:
+async def require_authenticated_user_key(
+    claims: Annotated[UserKeyClaims, Depends(require_user_key_claims)],
+) -> str:
+    """Check if the provided user key is valid."""
+    return str(claims.user_id)
+
+
+async def require_admin(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    claims: Annotated[UserKeyClaims, Depends(require_user_key_claims)],
+) -> Admin:
     """Check if the provided VPL API key is valid."""
     # check that active vpl user exisis
 
-    user  = db_session.exec(
-        select(Admin).where(
-            Admin.id == user_id,
-            Admin.is_active == True,
-        )
-    ).first()
+    user = None
+    if claims.role in (None, UserRole.admin):
+        user = await _get_principal(db_session, Admin, claims.user_id)
 
     if not user:
         raise APIException(
@@ -88,12 +144,12 @@ def require_admin(
     return user
 
 
-def require_super_admin(
-    db_session: Annotated[Session, Depends(require_db_session)],
-    user_id: Annotated[str, Depends(require_authenticated_user_key)],
+async def require_super_admin(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    claims: Annotated[UserKeyClaims, Depends(require_user_key_claims)],
 ) -> Admin:
     """Check if the provided user key is valid and is a super admin."""
-    admin = require_admin(db_session, user_id)
+    admin = await require_admin(db_session, claims)
     if not admin.is_super_admin:
         raise APIException(
             message="You are not authorized to access this resource.",
@@ -104,14 +160,14 @@ def require_super_admin(
     return admin
 
 
-def require_super_admin_or_anonymous(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def require_super_admin_or_anonymous(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(SECURITY_HEADER)],
 ) -> Admin | None:
     """Check if the provided user key is valid and is a admin or anonymous."""
     try:
-        user_id = require_authenticated_user_key(credentials=credentials)
-        admin = require_admin(db_session, user_id)
+        claims = await require_user_key_claims(credentials=credentials)
+        admin = await require_admin(db_session, claims)
     except APIException:
         return None
 
@@ -125,15 +181,15 @@ def require_super_admin_or_anonymous(
     return admin
 
 
-def require_student(
-    db_session: Annotated[Session, Depends(require_db_session)],
-    user_id: Annotated[str, Depends(require_authenticated_user_key)],
+async def require_student(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    claims: Annotated[UserKeyClaims, Depends(require_user_key_claims)],
 ) -> Student:
     """Check if the provided user key is valid and is a student."""
 
-    user = db_session.exec(
-        select(Student).where(Student.id == user_id)
-    ).first()
+    user = None
+    if claims.role in (None, UserRole.student):
+        user = await _get_principal(db_session, Student, claims.user_id)
 
     if not user:
         raise APIException(
@@ -144,17 +200,22 @@ def require_student(
     return user
 
 
-def require_admin_or_student(
-    db_session: Annotated[Session, Depends(require_db_session)],
-    user_id: Annotated[str, Depends(require_authenticated_user_key)],
-) -> Student:
+async def require_admin_or_student(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    claims: Annotated[UserKeyClaims, Depends(require_user_key_claims)],
+) -> Admin | Student:
     """Check if the provided user key is valid and is a student or admin."""
 
+    # keys carrying a role resolve with a single lookup, older keys without
+    # one fall back to trying the admins first and then the students.
+    if claims.role == UserRole.student:
+        return await require_student(db_session, claims)
+
     try:
-        return require_admin(db_session, user_id)
+        return await require_admin(db_session, claims)
     except APIException:
         try:
-            return require_student(db_session, user_id)
+            return await require_student(db_session, claims)
         except APIException as error:
             raise APIException(
                 message="User not found.",
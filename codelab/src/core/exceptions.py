@@ -11,6 +11,7 @@ class APIException(HTTPException):
         error_code: APIErrorCodes,
         status_code: int = status.HTTP_401_UNAUTHORIZED,
         detail: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
     ):
         if detail is None:
             detail = {"error_code": error_code, "message": message}
@@ -21,5 +22,6 @@ class APIException(HTTPException):
         super().__init__(
             status_code=status_code, 
             detail=detail,
+            headers=headers,
         )
 
@@ -0,0 +1,203 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Literal
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.redis import get_async_redis_client, get_redis_client
+from src.log import logger
+
+if TYPE_CHECKING:
+    from celery import Celery
+
+# sorted set of worker hostnames scored by the time of their last heartbeat,
+# a single range read tells which workers are alive.
+WORKER_HEARTBEATS_KEY = "codelab:heartbeats:workers"
+
+HealthStatus = Literal["ok", "error"]
+
+# probes within the ttl reuse the last result of the cheap check
+_health_cache = TTLCache(maxsize=1, ttl=settings.HEALTH_CHECK_CACHE_TTL_SECONDS)
+
+
+class ComponentHealth(BaseModel):
+    status: HealthStatus
+    latency_ms: float
+    message: str | None = None
+
+
+class HealthCheckResponse(BaseModel):
+    status: HealthStatus
+    worker_status: HealthStatus
+    database_status: HealthStatus
+    redis_status: HealthStatus
+
+    # hostnames of the workers that are alive
+    workers: list[str]
+    components: dict[str, ComponentHealth]
+
+
+class WorkerHeartbeat:
+    """
+    Publishes the liveness of a worker to Redis from a background thread.
+
+    A worker is alive while its last heartbeat is newer than
+    `WORKER_HEARTBEAT_TTL_SECONDS`, so a crashed worker drops out on its own.
+    """
+
+    def __init__(self, hostname: str) -> None:
+        self.hostname = hostname
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="worker-heartbeat", daemon=True
+        )
+
+    def _beat(self) -> None:
+        now = time.time()
+        try:
+            with get_redis_client().pipeline() as pipeline:
+                pipeline.zadd(WORKER_HEARTBEATS_KEY, {self.hostname: now})
+                # drop workers that died without removing themselves
+                pipeline.zremrangebyscore(
+                    WORKER_HEARTBEATS_KEY,
+                    "-inf",
+                    now - settings.WORKER_HEARTBEAT_TTL_SECONDS,
+                )
+                pipeline.execute()
+        except RedisError as error:
+            logger.warning(
+                f"Failed to publish heartbeat of worker {self.hostname}: {error}"
+            )
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._beat()
+            self._stopped.wait(settings.WORKER_HEARTBEAT_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop beating and remove the worker so it is reported down right away."""
+
+        self._stopped.set()
+        self._thread.join(timeout=settings.WORKER_HEARTBEAT_INTERVAL_SECONDS)
+        try:
+            get_redis_client().zrem(WORKER_HEARTBEATS_KEY, self.hostname)
+        except RedisError as error:
+            logger.warning(
+                f"Failed to remove heartbeat of worker {self.hostname}: {error}"
+            )
+
+
+def _elapsed_ms(started_at: float) -> float:
+    return round((time.perf_counter() - started_at) * 1000, 3)
+
+
+async def _check_database(db_session: AsyncSession) -> ComponentHealth:
+    started_at = time.perf_counter()
+    try:
+        await db_session.exec(text("SELECT 1"))  # type: ignore
+    except Exception as error:
+        return ComponentHealth(
+            status="error", latency_ms=_elapsed_ms(started_at), message=str(error)
+        )
+
+    return ComponentHealth(status="ok", latency_ms=_elapsed_ms(started_at))
+
+
+async def _get_alive_workers() -> tuple[ComponentHealth, list[str]]:
+    """Read the workers with a recent heartbeat, this doubles as the Redis check."""
+
+    started_at = time.perf_counter()
+    try:
+        workers = await get_async_redis_client().zrangebyscore(
+            WORKER_HEARTBEATS_KEY,
+            time.time() - settings.WORKER_HEARTBEAT_TTL_SECONDS,
+            "+inf",
+        )
+    except RedisError as error:
+        return ComponentHealth(
+            status="error", latency_ms=_elapsed_ms(started_at), message=str(error)
+        ), []
+
+    return ComponentHealth(status="ok", latency_ms=_elapsed_ms(started_at)), [
+        worker.decode() for worker in workers
+    ]
+
+
+def _build_response(
+    database: ComponentHealth,
+    redis: ComponentHealth,
+    worker: ComponentHealth,
+    workers: list[str],
+) -> HealthCheckResponse:
+    components = {"database": database, "redis": redis, "worker": worker}
+    return HealthCheckResponse(
+        status="ok"
+        if all(component.status == "ok" for component in components.values())
+        else "error",
+        worker_status=worker.status,
+        database_status=database.status,
+        redis_status=redis.status,
+        workers=workers,
+        components=components,
+    )
+
+
+async def check_health(db_session: AsyncSession) -> HealthCheckResponse:
+    """Check the api from cached state, workers are alive if they sent a recent heartbeat."""
+
+    cached = _health_cache.get("health")
+    if cached is not None:
+        return cached
+
+    database = await _check_database(db_session)
+    redis, workers = await _get_alive_workers()
+
+    # the heartbeats were read as part of the redis check, no extra latency
+    worker = ComponentHealth(
+        status="ok" if workers else "error",
+        latency_ms=redis.latency_ms,
+        message=None if workers else "No worker heartbeat received.",
+    )
+    response = _build_response(database, redis, worker, workers)
+    _health_cache.set("health", response)
+    return response
+
+
+async def deep_check_health(
+    db_session: AsyncSession, celery_app: "Celery"
+) -> HealthCheckResponse:
+    """Check the api by broadcasting a ping to every worker, this waits up to the ping timeout."""
+
+    database = await _check_database(db_session)
+    redis, _ = await _get_alive_workers()
+
+    started_at = time.perf_counter()
+    try:
+        # the celery broadcast blocks, keep it off the event loop
+        replies = await run_in_threadpool(
+            celery_app.control.inspect(
+                timeout=settings.HEALTH_CHECK_PING_TIMEOUT_SECONDS
+            ).ping
+        )
+        workers = sorted(replies or {})
+        worker = ComponentHealth(
+            status="ok" if workers else "error",
+            latency_ms=_elapsed_ms(started_at),
+            message=None if workers else "No worker answered the ping.",
+        )
+    except Exception as error:
+        workers = []
+        worker = ComponentHealth(
+            status="error", latency_ms=_elapsed_ms(started_at), message=str(error)
+        )
+
+    return _build_response(database, redis, worker, workers)
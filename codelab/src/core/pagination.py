@@ -0,0 +1,131 @@
+import base64
+import binascii
+import json
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Annotated, Any, Generic, TypeVar
+from uuid import UUID
+
+from fastapi import Query, status
+from pydantic import BaseModel
+from sqlalchemy import Select, and_, or_
+from sqlmodel import SQLModel, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.core.config import settings
+from src.core.exceptions import APIException
+from src.core.schemas import APIErrorCodes
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+class CursorPage(BaseModel, Generic[SchemaT]):
+    items: list[SchemaT]
+
+    # pass as `cursor` to get the next page, None when this is the last page
+    next_cursor: str | None
+
+
+class PaginationParams(BaseModel):
+    cursor: str | None
+    limit: int
+
+
+def require_pagination_params(
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[
+        int, Query(ge=1, le=settings.MAX_PAGE_SIZE)
+    ] = settings.DEFAULT_PAGE_SIZE,
+) -> PaginationParams:
+    """Get the pagination query parameters."""
+    return PaginationParams(cursor=cursor, limit=limit)
+
+
+def _encode_cursor(created_at: datetime, id: UUID) -> str:
+    """Encode the sort key of the last item of a page."""
+
+    payload = json.dumps([created_at.isoformat(), str(id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a cursor created by `_encode_cursor`."""
+
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (binascii.Error, ValueError, TypeError) as error:
+        raise APIException(
+            message="Invalid pagination cursor.",
+            error_code=APIErrorCodes.INVALID_CURSOR,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        ) from error
+
+
+def project_columns(
+    model: type[SQLModel],
+    schema: type[BaseModel],
+    include: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+) -> list[Any]:
+    """
+    Get the columns of model to select for a response schema.
+
+    Fields in `exclude` (heavy columns like logs and results) are left out
+    unless they are also in `include`. The `(created_at, id)` pagination key
+    is always selected.
+    """
+
+    skipped = set(exclude) - set(include)
+    table_columns = model.__table__.columns  # type: ignore
+    fields = dict.fromkeys(["id", "created_at", *schema.model_fields])
+
+    return [
+        table_columns[field]
+        for field in fields
+        if field in table_columns and field not in skipped
+    ]
+
+
+async def paginate(
+    db_session: AsyncSession,
+    statement: Select[Any],
+    model: type[SQLModel],
+    schema: type[SchemaT],
+    params: PaginationParams,
+) -> CursorPage[SchemaT]:
+    """
+    Get a page of a projected `select` statement using keyset pagination.
+
+    Rows are ordered by `(created_at, id)` and the cursor holds that key for
+    the last row, so each page is a single indexed range scan no matter how
+    deep into the results it is.
+    """
+
+    created_at, id = col(model.created_at), col(model.id)  # type: ignore
+
+    if params.cursor:
+        cursor_created_at, cursor_id = _decode_cursor(params.cursor)
+        statement = statement.where(
+            or_(
+                created_at > cursor_created_at,
+                and_(created_at == cursor_created_at, id > cursor_id),
+            )
+        )
+
+    # fetch one extra row to know if there is a next page
+    rows = (
+        await db_session.exec(
+            statement.order_by(created_at, id).limit(params.limit + 1)  # type: ignore
+        )
+    ).all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return CursorPage[schema](  # type: ignore
+        items=[schema.model_validate(dict(row._mapping)) for row in rows],
+        next_cursor=next_cursor,
+    )
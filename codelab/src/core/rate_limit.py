@@ -0,0 +1,79 @@
+from redis.asyncio.client import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
+
+from src.core.redis import get_async_redis_client
+from src.log import logger
+
+RATE_LIMIT_PREFIX = "codelab:rate-limit"
+
+# refills the bucket for the time passed since the last request and takes a
+# token if there is one. Returns 0 when allowed, otherwise the seconds until
+# a token is available (as a string, Lua numbers are truncated to integers).
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_rate = tonumber(ARGV[2])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * refill_rate)
+
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / refill_rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / refill_rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class TokenBucketLimiter:
+    """
+    Redis token bucket shared by all api processes.
+
+    Each key gets a bucket of `capacity` tokens, refilled at `refill_per_second`.
+    A request takes one token, requests on an empty bucket are rejected.
+    """
+
+    def __init__(self, name: str, capacity: int, refill_per_second: float) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._scripts: dict[int, AsyncScript] = {}
+
+    def _get_script(self, client: Redis) -> AsyncScript:
+        # scripts are bound to a client, the client is shared per process
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = self._scripts[id(client)] = client.register_script(
+                TOKEN_BUCKET_SCRIPT
+            )
+        return script
+
+    async def acquire(self, key: str) -> float:
+        """
+        Take a token from the bucket of key.
+
+        Returns 0 when a token was taken, otherwise the seconds to wait before
+        retrying. The limiter fails open when Redis is unavailable.
+        """
+
+        client = get_async_redis_client()
+        try:
+            retry_after = await self._get_script(client)(
+                keys=[f"{RATE_LIMIT_PREFIX}:{self.name}:{key}"],
+                args=[self.capacity, self.refill_per_second],
+            )
+        except RedisError as error:
+            logger.warning(f"Rate limiter {self.name} is unavailable: {error}")
+            return 0
+
+        return float(retry_after)
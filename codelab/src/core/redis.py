@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+import redis
+import redis.asyncio
+
+from src.core.config import settings
+
+
+@lru_cache
+def get_redis_client() -> redis.Redis:
+    """Get the shared Redis client of this process, connections are pooled by the client."""
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+@lru_cache
+def get_async_redis_client() -> redis.asyncio.Redis:
+    """Get the shared asyncio Redis client of the api, connections are pooled by the client."""
+    return redis.asyncio.Redis.from_url(settings.REDIS_URL)
@@ -0,0 +1,38 @@
+from typing import Any, Generic, TypeVar
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+
+class ResponseSerializer(Generic[T]):
+    """
+    Serializes responses of a type straight to JSON bytes.
+
+    The serializer of the type is compiled once, responses then skip FastAPI's
+    validation and `jsonable_encoder` passes over the content. Routes using it
+    should still declare `response_model` so the OpenAPI schema is unchanged.
+    """
+
+    def __init__(self, type_: type[T], **dump_options: Any) -> None:
+        self._adapter = TypeAdapter(type_)
+        self._dump_options = dump_options
+
+    def dump_json(self, content: T) -> bytes:
+        # `warnings` is off as JSON columns of table models hold plain dicts
+        # rather than the declared schemas, they serialize the same way.
+        return self._adapter.dump_json(content, warnings=False, **self._dump_options)
+
+    def response(
+        self,
+        content: T,
+        status_code: int = status.HTTP_200_OK,
+        headers: dict[str, str] | None = None,
+    ) -> Response:
+        return Response(
+            content=self.dump_json(content),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/json",
+        )
@@ -1,4 +1,23 @@
 from enum import StrEnum
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class UserRole(StrEnum):
+    """Roles a user key can be issued for."""
+
+    admin = "admin"
+    student = "student"
+
+
+class UserKeyClaims(BaseModel):
+    """Claims carried by a user key."""
+
+    user_id: UUID
+
+    # keys issued before roles were added to the claims do not have a role
+    role: UserRole | None = None
 
 
 class APIErrorCodes(StrEnum):
@@ -14,11 +33,16 @@ class APIErrorCodes(StrEnum):
         SERVICE_FORBIDDEN: The VPL service is not allowed to perform this action. \n
         SERVICE_AUTHENTICATION_FAILED: The VPL service authentication failed. Reason will be in the detail. \n
 
-        LANGUAGE_IMAGE_BUILD_IN_PROGRESS: Unable to trigger language build as a build is in progress. \n
+        LANGUAGE_IMAGE_BUILD_IN_PROGRESS: Unable to trigger language build as the image is being built. \n
+        LANGUAGE_IMAGE_NOT_AVAILABLE: The language image does not exist or is not available. \n
 
         SESSION_INACTIVE: The session is inactive. \n
 
         NOT_FOUND: The object was not found. \n
+
+        INVALID_CURSOR: The pagination cursor is malformed. \n
+
+        RATE_LIMITED: Too many requests, retry after the seconds in the `Retry-After` header. \n
     """
 
     # User errors
@@ -33,6 +57,7 @@ class APIErrorCodes(StrEnum):
 
     # language image errors
     LANGUAGE_IMAGE_BUILD_IN_PROGRESS = "language_image_build_in_progress"
+    LANGUAGE_IMAGE_NOT_AVAILABLE = "language_image_not_available"
 
     # session initialization errors
     INVALID_ENROLLMENT_DATA = "invalid_enrollment_data"
@@ -45,9 +70,13 @@ class APIErrorCodes(StrEnum):
     TASK_QUEUE_FULL = "task_queue_full"
     TASK_EXECUTION_THRESHOLD_EXCEEDED = "task_execution_threshold_exceeded"
     TASK_ALREADY_IN_QUEUE = "task_already_in_queue"
+    RATE_LIMITED = "rate_limited"
 
     # general object errors
     NOT_FOUND = "not_found"
+
+    # pagination errors
+    INVALID_CURSOR = "invalid_cursor"
     
 
 
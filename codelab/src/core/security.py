@@ -1,4 +1,4 @@
-import datetime
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 from fastapi.security import HTTPBearer
 import jwt
@@ -6,6 +6,7 @@ from passlib.context import CryptContext
 from passlib.exc import UnknownHashError
 
 from src.core.config import settings
+from src.core.schemas import UserRole
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -21,11 +22,17 @@ def verify_vpl_key(vpl_key: str) -> bool:
     return vpl_key == settings.VPL_API_KEY
 
 
-def generate_user_key(user_id: str) -> str:
-    """Generate a JWT token for the user."""
+def generate_user_key(user_id: str, role: UserRole) -> str:
+    """
+    Generate a JWT token for the user.
+
+    The role is embedded in the claims so the auth dependencies only have to
+    look the user up in the table for that role.
+    """
     payload = {
-        "sub": user_id,
-        "exp": datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1),
+        "sub": str(user_id),
+        "role": role.value,
+        "exp": datetime.now(timezone.utc) + timedelta(days=1),
     }
 
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
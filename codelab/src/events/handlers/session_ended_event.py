@@ -1,10 +1,11 @@
 from typing import Any
 
-from sqlmodel import col, update
+from sqlmodel import col, select, update
 
 from src.events.handlers.base import AbstractLifeCycleEventHandler
 from src.models import Session, Task
 from src.sandbox.tasks import prune_all_containers_task
+from src.sandbox.views import invalidate_session_execution_views
 from src.schemas import TaskStatus
 
 
@@ -26,6 +27,12 @@ class SessionEndedEventHandler(AbstractLifeCycleEventHandler):
         )
         self.db_session.commit()
 
+        # cached task views skip the active session check, stop serving them
+        for session_id in self.db_session.exec(
+            select(Session.id).where(Session.external_id == external_session_id)
+        ):
+            invalidate_session_execution_views(session_id)
+
         # mark all active / running student tasks as dropped
         self.db_session.exec(
             update(Task)
@@ -2,12 +2,8 @@ from typing import Any
 from uuid import UUID
 
 from pydantic import BaseModel, Field, PositiveInt, model_validator
-from src.models import LanguageImage
-from src.schemas import ImageStatus
 from typing_extensions import Self
 from src.events.enums import LifeCycleEvent
-from sqlmodel import Session as DbSession, select
-from src.core.db import engine
 
 
 class TestCaseCreationSchema(BaseModel):
@@ -85,22 +81,6 @@ class SessionCreationEventData(BaseModel):
 
         return self
 
-    @model_validator(mode="after")
-    def check_language_image_id(self) -> Self:
-        """Check that language image exisits and is available."""
-        with DbSession(engine) as db_session:
-            image = db_session.exec(select(LanguageImage).where(
-                LanguageImage.id == self.language_image_id)
-            ).first()
-            
-            if not image:
-                raise ValueError("Language Image not found.")
-            
-            if image.status != ImageStatus.available:
-                raise ValueError("Language image is not available.")
-            
-        return self
-
 
 class StudentJoinEventData(BaseModel):
     student_external_id: str
@@ -1,11 +1,43 @@
 from typing import Annotated
 
-from fastapi import Body
+from fastapi import Body, Depends, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.events.schemas import LifeCycleEventData
-from src.events.tasks import lifecycle_event_handler_task
+from src.core.celery import send_task
+from src.core.dependecies import require_db_session
+from src.core.exceptions import APIException
+from src.core.schemas import APIErrorCodes
+from src.events.schemas import LifeCycleEventData, SessionCreationEventData
+from src.models import LanguageImage
+from src.schemas import ImageStatus
 
 
-def event_handler_service(event_data: Annotated[LifeCycleEventData, Body()]) -> None:
+async def _check_language_image_available(
+    db_session: AsyncSession,
+    event_data: SessionCreationEventData,
+) -> None:
+    """Check that the language image of a new session exists and is available."""
+
+    image_status = (await db_session.exec(
+        select(LanguageImage.status).where(LanguageImage.id == event_data.language_image_id)
+    )).first()
+
+    if image_status != ImageStatus.available:
+        raise APIException(
+            message="Language image not found or not available.",
+            error_code=APIErrorCodes.LANGUAGE_IMAGE_NOT_AVAILABLE,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+async def event_handler_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    event_data: Annotated[LifeCycleEventData, Body()],
+) -> None:
     """Handle the event data."""
-    lifecycle_event_handler_task.delay(event_data.model_dump(mode="json"))
+
+    if isinstance(event_data.event_data, SessionCreationEventData):
+        await _check_language_image_available(db_session, event_data.event_data)
+
+    send_task("lifecycle_event_handler_task", args=[event_data.model_dump(mode="json")])
@@ -1,10 +1,11 @@
-import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
+from src.core.compression import CompressionMiddleware
 from src.core.config import settings
 from src.routes import router as main_router
+from src.sandbox.views import VERSION_HEADER
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -12,6 +13,9 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+    # only imported when enabled, the sdk is slow to import
+    import sentry_sdk
+
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
 app = FastAPI(
@@ -20,6 +24,12 @@ app = FastAPI(
     generate_unique_id_function=custom_generate_unique_id,
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+    compresslevel=settings.RESPONSE_COMPRESSION_LEVEL,
+)
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
@@ -28,6 +38,8 @@ if settings.all_cors_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # lets browser clients read the view version to wait for changes
+        expose_headers=[VERSION_HEADER],
     )
 
 
@@ -7,6 +7,7 @@ from sqlmodel import (
     TIMESTAMP,
     Column,
     Field,
+    Index,
     Relationship,
     SQLModel,
     UniqueConstraint,
@@ -17,6 +18,7 @@ from sqlmodel import (
 from src.schemas import (
     DatabaseExecutionResult,
     EvaluationFlag,
+    ImagePullPolicy,
     ImageStatus,
     SessionEnrollmentMethod,
     SessionInitializationStage,
@@ -51,13 +53,22 @@ class LanguageImage(BaseModel, table=True):
     version: str
     description: str
     base_image: str
+    base_image_pull_policy: ImagePullPolicy = Field(
+        default=ImagePullPolicy.if_not_present,
+        sa_column_kwargs={"server_default": ImagePullPolicy.if_not_present.value},
+        description="When to pull the base image from the registry before a build.",
+    )
+    base_image_digest: str | None = Field(
+        default=None,
+        nullable=True,
+        description="Digest of the base image used by the last successful build.",
+    )
     docker_image_id: str | None
     status: ImageStatus
 
     created_by_id: uuid.UUID | None = Field(foreign_key="admin.id", nullable=True)
     created_by: 'Admin' = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
-    build_logs: JsonValue | None = Field(default=None, sa_column=Column(JSON))
     push_logs: JsonValue | None = Field(default=None, sa_column=Column(JSON))
 
     failure_message: str | None = Field(
@@ -133,6 +144,19 @@ class LanguageImage(BaseModel, table=True):
     image_size: str | None
     image_architecture: str | None
 
+    # usage statistics, used to evict the least recently used images
+    last_used_at: datetime | None = Field(
+        default=None,
+        nullable=True,
+        index=True,
+        description="When a program was last executed on this image.",
+    )
+    execution_count: int = Field(
+        default=0,
+        sa_column_kwargs={"server_default": "0"},
+        description="Number of programs executed on this image.",
+    )
+
     class Config:
         arbitrary_types_allowed = True
 
@@ -392,12 +416,17 @@ class Task(BaseModel, table=True):
     A task is a submission from the student / group before they make a final submission for grading.
     """
 
+    __table_args__ = (Index("ix_task_session_id_status", "session_id", "status"),)
+
     celery_task_id: str | None = Field(default=None)
     entry_file_path: str = Field(description="The entry file of the submitted program.")
 
     exercise_id: uuid.UUID = Field(foreign_key="exercise.id")
     exercise: Exercise = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
+    # denormalised from `exercise.session_id` so queue queries do not need to join
+    session_id: uuid.UUID | None = Field(default=None, foreign_key="session.id", nullable=True)
+
     student_id: uuid.UUID | None = Field(foreign_key="student.id")
     student: Student = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
@@ -420,6 +449,10 @@ class ExerciseSubmission(BaseModel, table=True):
     This model represents a VPL student / group execercise submission.
     """
 
+    __table_args__ = (
+        Index("ix_exercisesubmission_session_id_status", "session_id", "status"),
+    )
+
     celery_task_id: str | None = Field(default=None)
 
     entry_file_path: str = Field(
@@ -429,6 +462,9 @@ class ExerciseSubmission(BaseModel, table=True):
     exercise_id: uuid.UUID = Field(foreign_key="exercise.id")
     exercise: Exercise = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
+    # denormalised from `exercise.session_id` so queue queries do not need to join
+    session_id: uuid.UUID | None = Field(default=None, foreign_key="session.id", nullable=True)
+
     student_id: uuid.UUID | None = Field(foreign_key="student.id")
     student: Student = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
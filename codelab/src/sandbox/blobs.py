@@ -0,0 +1,95 @@
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+
+from src.core.config import settings
+from src.schemas import BlobReference, DatabaseExecutionResult
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobNotFoundError(Exception):
+    """Raised when a blob does not exist in the store."""
+
+
+def _get_blob_path(digest: str) -> str:
+    """Get the path of a blob, blobs are sharded by the first two characters of the digest."""
+
+    if not _DIGEST_PATTERN.match(digest):
+        raise BlobNotFoundError(digest)
+
+    return os.path.join(settings.FILESYSTEM_DIR, "blobs", digest[:2], f"{digest}.gz")
+
+
+def put_blob(data: bytes) -> BlobReference:
+    """
+    Store data in the content addressed blob store.
+
+    Blobs are keyed by the sha256 of their uncompressed content so identical
+    outputs are only written (and compressed) once.
+    """
+
+    digest = hashlib.sha256(data).hexdigest()
+    path = _get_blob_path(digest)
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write to a temporary file first so concurrent writers and readers
+        # never see a partially written blob.
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(file_descriptor, "wb") as temp_file:
+                temp_file.write(gzip.compress(data, compresslevel=6))
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    return BlobReference(digest=digest, size=len(data))
+
+
+def read_blob(digest: str, offset: int = 0, length: int | None = None) -> bytes:
+    """Read `length` bytes of a blob's uncompressed content starting at `offset`."""
+
+    try:
+        with gzip.open(_get_blob_path(digest), "rb") as blob:
+            blob.seek(offset)
+            return blob.read(-1 if length is None else length)
+    except FileNotFoundError as error:
+        raise BlobNotFoundError(digest) from error
+
+
+def _offload_output(output: str | None) -> tuple[str | None, BlobReference | None]:
+    """Move an output to the blob store if it is too large to keep inline."""
+
+    if output is None:
+        return output, None
+
+    data = output.encode()
+    if len(data) <= settings.EXECUTION_OUTPUT_INLINE_LIMIT:
+        return output, None
+
+    # keep the start of the output inline as a preview of the full blob
+    preview = data[: settings.EXECUTION_OUTPUT_INLINE_LIMIT].decode(errors="ignore")
+    return preview, put_blob(data)
+
+
+def offload_execution_result(
+    result: DatabaseExecutionResult,
+) -> DatabaseExecutionResult:
+    """Move large std_out / std_err of an execution result to the blob store."""
+
+    std_out, std_out_blob = _offload_output(result.std_out)
+    std_err, std_err_blob = _offload_output(result.std_err)
+
+    return result.model_copy(
+        update={
+            "std_out": std_out,
+            "std_out_blob": std_out_blob,
+            "std_err": std_err,
+            "std_err_blob": std_err_blob,
+        }
+    )
@@ -0,0 +1,87 @@
+import os
+from types import TracebackType
+from uuid import UUID
+
+from typing_extensions import Self
+
+from src.core.config import settings
+
+TRUNCATED_MESSAGE = "\n[build log truncated, limit of {limit} bytes reached]\n"
+
+
+def get_build_log_path(image_id: UUID | str) -> str:
+    """Get the path of the build log of a language image."""
+    return os.path.join(settings.FILESYSTEM_DIR, "images", str(image_id), "build.log")
+
+
+class BuildLogWriter:
+    """
+    Append only writer of a language image build log.
+
+    Chunks are flushed as they are written so the log can be tailed while the
+    build runs. Writes past `IMAGE_BUILD_LOG_MAX_SIZE` are dropped and a single
+    truncation notice is appended instead.
+    """
+
+    def __init__(self, image_id: UUID | str) -> None:
+        path = get_build_log_path(image_id)
+        os.makedirs(os.path.dirname(path), mode=0o777, exist_ok=True)
+
+        # every build starts a new log
+        self._file = open(path, "wb")
+        self._size = 0
+        self._truncated = False
+
+    def write(self, message: str) -> None:
+        """Append a message to the log."""
+
+        if self._truncated or not message:
+            return
+
+        data = message.encode()
+        remaining = settings.IMAGE_BUILD_LOG_MAX_SIZE - self._size
+        if len(data) > remaining:
+            data = (
+                data[:remaining]
+                + TRUNCATED_MESSAGE.format(
+                    limit=settings.IMAGE_BUILD_LOG_MAX_SIZE
+                ).encode()
+            )
+            self._truncated = True
+
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def read_build_log(
+    image_id: UUID | str, offset: int = 0, length: int | None = None
+) -> tuple[bytes, int]:
+    """
+    Read `length` bytes of a build log starting at `offset`.
+
+    Returns the bytes read and the current size of the log, images that were
+    never built have an empty log.
+    """
+
+    try:
+        with open(get_build_log_path(image_id), "rb") as build_log:
+            size = os.fstat(build_log.fileno()).st_size
+            build_log.seek(offset)
+            return build_log.read(-1 if length is None else length), size
+    except FileNotFoundError:
+        return b"", 0
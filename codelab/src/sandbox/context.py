@@ -0,0 +1,132 @@
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy.orm import joinedload
+from sqlmodel import Session, select
+
+from src.models import Exercise, ExerciseSubmission, Task
+from src.models import Session as WorkflowSession
+from src.sandbox.ochestator.schemas import ContainerConfig
+from src.schemas import ImageStatus, TaskStatus
+
+
+class LanguageImageContext(BaseModel):
+    """Snapshot of the language image fields needed to run a program."""
+
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: UUID
+    status: ImageStatus
+    docker_image_id: str | None
+    file_extension: str
+    requires_compilation: bool
+    compile_file_extension: str | None
+    compilation_command: str | None
+    default_execution_command: str
+
+
+class TestCaseContext(BaseModel):
+    """Snapshot of a test case to run a program against."""
+
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+
+    id: UUID
+    test_input: str
+    visible: bool
+
+
+class ExecutionContext(BaseModel):
+    """
+    Immutable snapshot of everything required to execute a task or submission.
+
+    The context is built once from an eagerly loaded request so the executors
+    never walk ORM relationships (and hit the database) while a program runs.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    request_id: UUID
+    is_submission: bool
+    session_id: UUID
+    session_admin_id: UUID
+    exercise_id: UUID
+    entry_file_path: str
+
+    # id of the student or group that owns the request
+    executor_id: str
+    docker_container_id: str | None
+
+    language_image: LanguageImageContext
+    container_config: ContainerConfig
+    test_cases: tuple[TestCaseContext, ...]
+
+    @classmethod
+    def from_request(cls, request: Task | ExerciseSubmission) -> "ExecutionContext":
+        """Build the context from a request loaded with `load_execution_request`."""
+
+        session = request.exercise.session
+        session_config = session.configuration
+        is_submission = isinstance(request, ExerciseSubmission)
+
+        # tasks only run against visible test cases, submissions are run against all of them
+        test_cases = [
+            TestCaseContext.model_validate(test_case)
+            for test_case in request.exercise.test_cases
+            if is_submission or test_case.visible
+        ]
+
+        owner = request.group if request.group_id else request.student
+
+        return cls(
+            request_id=request.id,
+            is_submission=is_submission,
+            session_id=session.id,
+            session_admin_id=session.admin_id,
+            exercise_id=request.exercise_id,
+            entry_file_path=request.entry_file_path,
+            executor_id=str(
+                request.student_id if request.student_id else request.group_id
+            ),
+            docker_container_id=owner.docker_container_id if owner else None,
+            language_image=LanguageImageContext.model_validate(session.language_image),
+            container_config=ContainerConfig(
+                cpu_time_limit_minutes=session_config.cpu_time_limit / 60,
+                memory_limit_kb=session_config.memory_limit,
+                max_processes=session_config.max_processes_and_or_threads,
+                enable_network=session_config.enable_network,
+            ),
+            test_cases=tuple(test_cases),
+        )
+
+
+def load_execution_request(
+    db_session: Session,
+    task_id: UUID | None = None,
+    submission_id: UUID | None = None,
+) -> Task | ExerciseSubmission | None:
+    """
+    Load a queued task or submission together with its execution relationships.
+
+    The exercise, session, language image, session configuration, owner and
+    test cases are loaded in the same round trip (test cases with a second
+    `IN` query) so building the `ExecutionContext` does not lazy load anything.
+    """
+
+    model: type[Task] | type[ExerciseSubmission] = (
+        Task if task_id else ExerciseSubmission
+    )
+    request_id = task_id if task_id else submission_id
+
+    session_path = joinedload(model.exercise).joinedload(Exercise.session)  # type: ignore
+
+    return db_session.exec(
+        select(model)
+        .where(model.id == request_id, model.status == TaskStatus.queued)
+        .options(
+            session_path.joinedload(WorkflowSession.language_image),  # type: ignore
+            session_path.joinedload(WorkflowSession.configuration),  # type: ignore
+            joinedload(model.exercise).selectinload(Exercise.test_cases),  # type: ignore
+            joinedload(model.student),  # type: ignore
+            joinedload(model.group),  # type: ignore
+        )
+    ).first()
@@ -9,6 +9,7 @@ from docker.models.containers import Container
 from src.external.schemas import CodeRepository
 from src.log import logger
 from src.sandbox.ochestator.schemas import ContainerConfig, ExecutionResult
+from src.sandbox.streams import ExecutionOutputPublisher
 from src.schemas import DatabaseExecutionResult
 from src.utils import TimeOutException, raise_timeout
 
@@ -23,6 +24,7 @@ class BaseExecutor(abc.ABC):  # noqa
         container_config: ContainerConfig,
         retry_limit: int = 2,
         code_repository: CodeRepository | None = None,
+        output_publisher: ExecutionOutputPublisher | None = None,
     ):
         """Construct executor to execute a task."""
         self.workdir = workdir
@@ -30,6 +32,7 @@ class BaseExecutor(abc.ABC):  # noqa
         self.container_config = container_config
         self.retry_limit = retry_limit
         self.code_repository = code_repository
+        self.output_publisher = output_publisher
         self.container = self._get_container()
 
     @abc.abstractmethod
@@ -68,17 +71,45 @@ class BaseExecutor(abc.ABC):  # noqa
         # Write all repository contents to the mount directory
         self.__write_repository(self.code_repository, self.mount_dir)
 
+    def _stream_command(
+        self, cmd: str, workdir: str
+    ) -> tuple[int, tuple[bytes | None, bytes | None]]:
+        """
+        Run a command with the low level exec API, passing output to the publisher
+        as it is produced. Returns the exit code and the full std_out / std_err.
+        """
+        api = self.container.client.api
+        exec_id = api.exec_create(
+            self.container.id, cmd=cmd, workdir=workdir, stdout=True, stderr=True, tty=False
+        )["Id"]
+
+        std_out: list[bytes] = []
+        std_err: list[bytes] = []
+        try:
+            for out_chunk, err_chunk in api.exec_start(exec_id, stream=True, demux=True):
+                if out_chunk:
+                    std_out.append(out_chunk)
+                    if self.output_publisher:
+                        self.output_publisher.write("std_out", out_chunk)
+                if err_chunk:
+                    std_err.append(err_chunk)
+                    if self.output_publisher:
+                        self.output_publisher.write("std_err", err_chunk)
+        finally:
+            if self.output_publisher:
+                self.output_publisher.flush()
+
+        return api.exec_inspect(exec_id)["ExitCode"], (
+            b"".join(std_out) if std_out else None,
+            b"".join(std_err) if std_err else None,
+        )
+
     def execute_commnd(self, command: str, workdir: str) -> ExecutionResult:
         """Execute a command and return the exit status and output."""
 
         try:
             full_cmd = f"bash -c '{command}'"
-            executon_result = self.container.exec_run(
-                cmd=full_cmd,
-                workdir=workdir,
-                demux=True,
-                tty=False,
-            )
+            executon_result = self._stream_command(cmd=full_cmd, workdir=workdir)
             server_error = False
         except APIError as error:
             logger.error(
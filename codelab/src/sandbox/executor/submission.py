@@ -1,10 +1,11 @@
 from docker.models.containers import Container
 
 from src.external.schemas import CodeRepository
-from src.models import ExerciseSubmission
+from src.sandbox.context import ExecutionContext
 from src.sandbox.executor.base import BaseExecutor
 from src.sandbox.ochestator.container import ContainerBuilder
 from src.sandbox.ochestator.schemas import ContainerConfig
+from src.sandbox.streams import ExecutionOutputPublisher
 
 
 class SubmissionExecutor(BaseExecutor):
@@ -12,34 +13,30 @@ class SubmissionExecutor(BaseExecutor):
         self,
         workdir: str,
         mount_dir: str,
-        submission: ExerciseSubmission,
+        context: ExecutionContext,
         container_config: ContainerConfig,
         code_repository: CodeRepository,
         retry_limit: int = 2,
     ):
         """Construct executor to execute a task."""
-        self.submission = submission
+        self.context = context
         super().__init__(
             workdir=workdir,
             mount_dir=mount_dir,
             container_config=container_config,
             retry_limit=retry_limit,
             code_repository=code_repository,
+            output_publisher=ExecutionOutputPublisher(context.request_id),
         )
 
     def _get_container(self) -> Container:
         """Get a Container for the task."""
 
         container_id = None
-        language_image = self.submission.exercise.session.language_image
 
-        if self.submission.student:
-            # Get student's container
-            container_id = f'submission-{self.submission.student.docker_container_id}'
-
-        if self.submission.group:
-            # Get group container
-            container_id = f'submission-{self.submission.group.docker_container_id}'
+        if self.context.docker_container_id:
+            # Get student's or group's container
+            container_id = f'submission-{self.context.docker_container_id}'
 
         if not container_id:
             raise ValueError("Container id should not be NULL at this point.")
@@ -47,7 +44,7 @@ class SubmissionExecutor(BaseExecutor):
         self._mount_code_repository()
 
         return ContainerBuilder(
-            language_image=language_image,
+            language_image=self.context.language_image,
             container_name=container_id,
             mount_dir=self.mount_dir,
             workdir=self.workdir,
@@ -0,0 +1,114 @@
+import threading
+from collections.abc import Generator
+from contextlib import contextmanager
+from uuid import UUID
+
+from redis.exceptions import LockError, LockNotOwnedError, RedisError
+from redis.lock import Lock
+
+from src.core.config import settings
+from src.core.redis import get_redis_client
+from src.log import logger
+
+IMAGE_BUILD_LOCK_PREFIX = "codelab:image-build-lock"
+IMAGE_BUILD_SLOT_PREFIX = "codelab:image-build-slot"
+
+
+class BuildSlotUnavailableError(Exception):
+    """Raised when all build slots are taken by other builds."""
+
+
+class ImageBuildLockedError(Exception):
+    """Raised when the language image is already being built or removed."""
+
+
+def _get_image_lock(image_id: UUID | str) -> Lock:
+    # locks expire so a crashed worker can not block an image forever, holders
+    # renew them while they run, see `_hold_lock`
+    return get_redis_client().lock(
+        f"{IMAGE_BUILD_LOCK_PREFIX}:{image_id}",
+        timeout=settings.IMAGE_BUILD_LOCK_TIMEOUT_SECONDS,
+        thread_local=False,
+    )
+
+
+@contextmanager
+def _hold_lock(lock: Lock) -> Generator[None, None, None]:
+    """
+    Keep an acquired lock alive until the block exits, then release it.
+
+    The lock is renewed to its full timeout every third of it from a background
+    thread, so builds running longer than the timeout keep it. It only expires
+    when the worker dies, or Redis is unreachable for longer than the timeout,
+    which is logged.
+    """
+
+    stopped = threading.Event()
+
+    def renew() -> None:
+        while not stopped.wait(settings.IMAGE_BUILD_LOCK_TIMEOUT_SECONDS / 3):
+            try:
+                lock.reacquire()
+            except LockNotOwnedError:
+                logger.error(f"Lock {lock.name} expired while it was held.")
+                return
+            except RedisError as error:
+                logger.warning(f"Unable to renew lock {lock.name}: {error}")
+
+    renewer = threading.Thread(target=renew, name=f"renew-{lock.name}", daemon=True)
+    renewer.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        renewer.join()
+        try:
+            lock.release()
+        except LockError as error:
+            logger.error(f"Unable to release lock {lock.name}: {error}")
+
+
+def is_image_locked(image_id: UUID | str) -> bool:
+    """Check if a language image is being built or removed by a worker."""
+    return _get_image_lock(image_id).locked()
+
+
+@contextmanager
+def image_lock(image_id: UUID | str) -> Generator[None, None, None]:
+    """
+    Hold the exclusive lock of a language image.
+
+    Raises `ImageBuildLockedError` right away if another worker holds it.
+    """
+
+    lock = _get_image_lock(image_id)
+    if not lock.acquire(blocking=False):
+        raise ImageBuildLockedError(str(image_id))
+
+    with _hold_lock(lock):
+        yield
+
+
+@contextmanager
+def image_build_slot() -> Generator[None, None, None]:
+    """
+    Hold one of the `MAX_CONCURRENT_IMAGE_BUILDS` global build slots.
+
+    Each slot is a lock of its own, the first free one is taken. Raises
+    `BuildSlotUnavailableError` when all slots are held.
+    """
+
+    client = get_redis_client()
+    for slot in range(settings.MAX_CONCURRENT_IMAGE_BUILDS):
+        lock = client.lock(
+            f"{IMAGE_BUILD_SLOT_PREFIX}:{slot}",
+            timeout=settings.IMAGE_BUILD_LOCK_TIMEOUT_SECONDS,
+            thread_local=False,
+        )
+        if lock.acquire(blocking=False):
+            break
+    else:
+        raise BuildSlotUnavailableError()
+
+    with _hold_lock(lock):
+        yield
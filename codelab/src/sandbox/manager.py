@@ -1,13 +1,11 @@
 import os
 from src.external.schemas import CodeRepository
-from src.models import ExerciseSubmission, Task, TestCase
+from src.sandbox.context import ExecutionContext, LanguageImageContext, TestCaseContext
 from src.sandbox.executor.task import TaskExecutor
 from src.sandbox.executor.submission import SubmissionExecutor
 from src.sandbox.executor.base import BaseExecutor
 from src.sandbox.ochestator.container import ContainerBuilderErrors
-from src.sandbox.ochestator.schemas import ContainerConfig
 from src.schemas import DatabaseExecutionResult
-from src.models import Session, LanguageImage
 from src.core.config import settings
 from src.log import logger
 from docker.errors import APIError
@@ -21,23 +19,10 @@ class ExecutionFailedError(Exception):
 
 class ResourceManager:
 
-    def _get_container_config(self, session: Session) -> ContainerConfig:
-        """Calculate the container configuration based on the given session configuration."""
-
-        session_config = session.configuration
-        container_config = ContainerConfig(
-            cpu_time_limit_minutes=session_config.cpu_time_limit / 60,
-            memory_limit_kb=session_config.memory_limit,
-            max_processes=session_config.max_processes_and_or_threads,
-            enable_network=session_config.enable_network
-        )
-
-        return container_config
-
     def _compilation_command(
         self,
         entry_file_path: str,
-        language_image: LanguageImage,
+        language_image: LanguageImageContext,
     ) -> tuple[str, str]:
         """Get the compilation command based on the given language image."""
         
@@ -62,7 +47,7 @@ class ResourceManager:
     def _execution_command(
         self,
         entry_file_path: str,
-        language_image: LanguageImage,
+        language_image: LanguageImageContext,
     ) -> str:
         """Get execution command."""
         
@@ -73,8 +58,8 @@ class ResourceManager:
     def _execute_program(
         self,
         entry_file_path: str,
-        language_image: LanguageImage,
-        available_test_cases: list[TestCase],
+        language_image: LanguageImageContext,
+        available_test_cases: tuple[TestCaseContext, ...],
         executor: BaseExecutor,
     ) -> list[DatabaseExecutionResult]:
         """Execute the program."""
@@ -104,7 +89,7 @@ class ResourceManager:
                 return [
                     DatabaseExecutionResult(
                         **result.model_dump(),
-                        test_case_id=test_case.id,
+                        test_case_id=str(test_case.id),
                     )
                     for test_case in available_test_cases
                 ] if available_test_cases else [
@@ -124,7 +109,7 @@ class ResourceManager:
                                 command=execution_command,
                                 std_in=test_case.test_input,
                             ).model_dump(exclude=['test_case_id']),
-                            test_case_id=test_case.id,
+                            test_case_id=str(test_case.id),
                         )
                     )
             else:
@@ -140,28 +125,19 @@ class ResourceManager:
 
     def _execute_task(
         self, 
-        task: Task, 
+        context: ExecutionContext, 
         code_repository: CodeRepository
     ) -> list[DatabaseExecutionResult]:
         """Execute a task."""
-        
-        session = task.exercise.session
-        language_image = session.language_image
-        container_config = self._get_container_config(session)
-        available_test_cases = [
-            test_case
-            for test_case in task.exercise.test_cases
-            if test_case.visible
-        ]
-
-        session_id = str(session.id)
-        executor_id =  str(task.student_id if task.student_id else task.group_id)
+
+        session_id = str(context.session_id)
+        executor_id = context.executor_id
         try:
             executor = TaskExecutor(
-                task=task,
+                context=context,
                 workdir=f"/{executor_id}",
                 mount_dir=os.path.join(settings.TESTING_DIR, session_id, executor_id),
-                container_config=container_config,
+                container_config=context.container_config,
                 code_repository=code_repository,
             )
         except ContainerBuilderErrors as error:
@@ -169,39 +145,34 @@ class ResourceManager:
                 'src::sandbox::manger::ResourceManager::_execute_task:: '
                 f'Container build failed with error: {error.error_message}',
                 extra={
-                    'task_id': str(task.id),
+                    'task_id': str(context.request_id),
                     'exit_code': error.exit_code,
                 }
             )
             raise ExecutionFailedError(error_message=error.error_message) from error
 
         return self._execute_program(
-            entry_file_path=task.entry_file_path,
-            language_image=language_image,
-            available_test_cases=available_test_cases,
+            entry_file_path=context.entry_file_path,
+            language_image=context.language_image,
+            available_test_cases=context.test_cases,
             executor=executor,
         )
 
     def _execute_submission(
         self, 
-        submission: ExerciseSubmission,
+        context: ExecutionContext,
         code_repository: CodeRepository,
     ) -> list[DatabaseExecutionResult]:
         """Execute an exercise submission."""
 
-        session = submission.exercise.session
-        language_image = session.language_image
-        container_config = self._get_container_config(session)
-        available_test_cases = submission.exercise.test_cases
-
-        session_id = str(session.id)
-        executor_id =  str(submission.student_id if submission.student_id else submission.group_id)
+        session_id = str(context.session_id)
+        executor_id = context.executor_id
         try:
             executor = SubmissionExecutor(
-                submission=submission,
+                context=context,
                 workdir=f"/{executor_id}",
                 mount_dir=os.path.join(settings.SUBMISSION_DIR, session_id, executor_id),
-                container_config=container_config,
+                container_config=context.container_config,
                 code_repository=code_repository,
             )
         except ContainerBuilderErrors as error:
@@ -209,29 +180,29 @@ class ResourceManager:
                 'src::sandbox::manger::ResourceManager::_execute_submission:: '
                 f'Container build failed with error: {error.error_message}',
                 extra={
-                    'submission_id': str(submission.id),
+                    'submission_id': str(context.request_id),
                     'exit_code': error.exit_code,
                 }
             )
             raise ExecutionFailedError(error_message=error.error_message) from error
 
         return self._execute_program(
-            entry_file_path=submission.entry_file_path,
-            language_image=language_image,
-            available_test_cases=available_test_cases,
+            entry_file_path=context.entry_file_path,
+            language_image=context.language_image,
+            available_test_cases=context.test_cases,
             executor=executor,
         )
 
     def execute(
         self, 
         code_repository: CodeRepository,
-        request: Task | ExerciseSubmission, 
+        context: ExecutionContext, 
     ) -> list[DatabaseExecutionResult]:
         """Execute a given task or exercise submission."""
         
-        if isinstance(request, Task):
-            print('EXECUTING AS TASK')
-            return self._execute_task(request, code_repository=code_repository)
+        if not context.is_submission:
+            logger.debug(f"Executing {context.request_id} as a task")
+            return self._execute_task(context, code_repository=code_repository)
 
-        print('EXECUTING AS SUBMISSION')
-        return self._execute_submission(request, code_repository=code_repository)
+        logger.debug(f"Executing {context.request_id} as a submission")
+        return self._execute_submission(context, code_repository=code_repository)
@@ -9,6 +9,7 @@ from docker.types import Ulimit
 
 from src.core.docker import get_shared_docker_client
 from src.models import LanguageImage
+from src.sandbox.context import LanguageImageContext
 from src.sandbox.ochestator.schemas import ContainerConfig
 from src.sandbox.types import CONTAINER_LABEL
 
@@ -32,7 +33,7 @@ class ContainerNotFound(ContainerBuilderErrors):
 class ContainerBuilder:
     def __init__(
         self,
-        language_image: LanguageImage,
+        language_image: LanguageImage | LanguageImageContext,
         mount_dir: str | None = None,
         workdir: str | None = None,
         container_name: str | None = None,
@@ -1,11 +1,15 @@
 import base64
+import hashlib
 import os
+import re
 from functools import cached_property
 from io import BytesIO
+from typing import Any
 
 from docker.errors import (  # type: ignore
     APIError,
     BuildError,
+    ImageNotFound,
 )
 from docker.models.images import Image  # type: ignore
 from sqlmodel import Session
@@ -14,15 +18,20 @@ from src.core.config import settings
 from src.core.docker import get_shared_docker_client
 from src.log import logger
 from src.models import LanguageImage
+from src.sandbox.build_logs import BuildLogWriter
 from src.sandbox.executor.build import ImageBuildExecutor
 from src.sandbox.ochestator.container import (
     ContainerBuildFailed,
     ContainerNotFound,
 )
-from src.schemas import ImageStatus
+from src.schemas import ImagePullPolicy, ImageStatus
 
 BYTES_PER_MB_BINARY = 1_048_576  # 2^20 bytes, binary definition
 
+# images built from the same Dockerfile are shared, they are found by this label
+DOCKERFILE_HASH_LABEL = "codelab.dockerfile_hash"
+BASE_IMAGE_REPOSITORY = "codelab-base"
+
 
 class ImageBuilder:
     """
@@ -74,36 +83,173 @@ class ImageBuilder:
             "RUN /scripts/entrypoint.sh \n"
         )
 
-    def _construct_docker_file(self) -> BytesIO:
+    def _pull_base_image(self, build_log: BuildLogWriter) -> Image:
+        """
+        Pulls the base image from the registry.
+        """
+        logger.info(
+            f"Pulling base image {self.language_image.base_image}",
+            extra={"image_id": self.language_image.id},
+        )
+        build_log.write(f"Pulling base image {self.language_image.base_image}\n")
+        return self.docker_client.images.pull(self.language_image.base_image)
+
+    def _resolve_base_image(self, build_log: BuildLogWriter) -> Image:
+        """
+        Returns the local base image, pulling it only when the pull policy requires it.
+
+        - always: the base image is pulled on every build.
+        - if_not_present: the base image is only pulled when it is missing locally.
+        - if_digest_changed: the base image is pulled when it is missing locally or when
+          the registry digest differs from the digest used by the last successful build.
+          The local image is used if the registry can not be reached.
+        """
+        policy = self.language_image.base_image_pull_policy
+        if policy == ImagePullPolicy.always:
+            return self._pull_base_image(build_log)
+
+        try:
+            local_image = self.docker_client.images.get(self.language_image.base_image)
+        except ImageNotFound:
+            return self._pull_base_image(build_log)
+
+        if policy == ImagePullPolicy.if_digest_changed:
+            try:
+                registry_data = self.docker_client.images.get_registry_data(
+                    self.language_image.base_image
+                )
+            except APIError as error:
+                logger.warning(
+                    f"Unable to check the digest of {self.language_image.base_image}, "
+                    f"using the local image: {error}",
+                    extra={"image_id": self.language_image.id},
+                )
+                return local_image
+
+            if registry_data.id != self.language_image.base_image_digest:
+                return self._pull_base_image(build_log)
+
+        return local_image
+
+    def _get_image_digest(self, image: Image) -> str:
+        """
+        Returns the registry digest of an image, or its id if it was not pulled from a registry.
+        """
+        repo_digests = image.attrs.get("RepoDigests") or []
+        return repo_digests[0].split("@", 1)[-1] if repo_digests else image.id
+
+    def _stream_build(self, build_log: BuildLogWriter, dockerfile: str, **kwargs: Any) -> Image:
+        """
+        Builds an image with the low level API, writing its output to the build log
+        as it arrives instead of collecting it in memory.
+        """
+        image_id = None
+        for chunk in self.docker_client.api.build(
+            fileobj=BytesIO(dockerfile.encode("utf-8")),
+            decode=True,
+            rm=True,
+            **kwargs,
+        ):
+            if "error" in chunk:
+                build_log.write(f"{chunk['error']}\n")
+                raise BuildError(chunk["error"], [])
+
+            if "stream" in chunk:
+                build_log.write(chunk["stream"])
+            elif "status" in chunk:
+                build_log.write(f"{chunk['status']} {chunk.get('progress', '')}\n")
+
+            if "ID" in chunk.get("aux", {}):
+                image_id = chunk["aux"]["ID"]
+
+        if image_id is None:
+            raise BuildError("Unknown image id, the build did not complete.", [])
+
+        return self.docker_client.images.get(image_id)
+
+    def _ensure_base_layer(self, base_image: Image, build_log: BuildLogWriter) -> str:
         """
-        Constructs the Dockerfile as a BytesIO object.
+        Builds the codelab base layer (the base image with bash installed) if it
+        does not exist yet and returns its tag. It is shared by every language image
+        built on the same version of the base image.
         """
+        name = re.sub(r"[^a-z0-9_.-]", "-", self.language_image.base_image.lower())
+        version = base_image.id.split(":", 1)[-1][:12]
+        tag = f"{BASE_IMAGE_REPOSITORY}:{name[:115]}-{version}"
+
+        try:
+            self.docker_client.images.get(tag)
+            return tag
+        except ImageNotFound:
+            pass
+
+        # the resolved base image is local, so it must not be pulled again
         dockerfile = (
             f"FROM {self.language_image.base_image}\n"
-            f"WORKDIR /{self.language_image.id}\n\n"
             "# Add bash so we can run bash commands\n"
-            "RUN apk update && apk add bash\n\n"
+            "RUN apk update && apk add bash\n"
+        )
+        self._stream_build(build_log, dockerfile, pull=False, tag=tag)
+        return tag
+
+    def _construct_docker_file(self, base_layer_tag: str) -> str:
+        """
+        Constructs the Dockerfile of the language image.
+
+        The Dockerfile only depends on the image configuration and base layer, so
+        language images with the same configuration produce the same Dockerfile.
+        """
+        dockerfile = (
+            f"FROM {base_layer_tag}\n"
+            "WORKDIR /workspace\n\n"
             f"{self._create_entrypoint_commands()}\n"
             "# Set the default command to run when the container starts\n"
             'CMD ["bash"]\n'
         )
         logger.debug("Constructed Dockerfile:\n%s", dockerfile)
-        return BytesIO(dockerfile.encode("utf-8"))
+        return dockerfile
+
+    def _find_image_by_dockerfile_hash(self, dockerfile_hash: str) -> Image | None:
+        """
+        Returns a local image built from a Dockerfile with the given hash.
+        """
+        images = self.docker_client.images.list(
+            filters={"label": f"{DOCKERFILE_HASH_LABEL}={dockerfile_hash}"}
+        )
+        return images[0] if images else None
 
     def _build(self) -> None:
         """
         Builds the Docker image and updates the language image status.
-        Returns the built Image or None if the build failed.
+
+        If an image was already built from an identical Dockerfile it is tagged
+        for this language image instead of being built again.
         """
         self._update_status(ImageStatus.building)
-        dockerfile = self._construct_docker_file()
 
         try:
-            image, build_logs = self.docker_client.images.build(
-                pull=True,
-                fileobj=dockerfile,
-                tag=str(self.language_image.id),
-            )
+            with BuildLogWriter(self.language_image.id) as build_log:
+                base_image = self._resolve_base_image(build_log)
+                base_layer_tag = self._ensure_base_layer(base_image, build_log)
+
+                dockerfile = self._construct_docker_file(base_layer_tag)
+                dockerfile_hash = hashlib.sha256(dockerfile.encode("utf-8")).hexdigest()
+
+                image = self._find_image_by_dockerfile_hash(dockerfile_hash)
+                if image is not None:
+                    image.tag(repository=str(self.language_image.id))
+                    build_log.write(
+                        f"Reusing image {image.id} built from an identical Dockerfile.\n"
+                    )
+                else:
+                    # the base layer only exists locally, it must not be pulled
+                    image = self._stream_build(
+                        build_log,
+                        dockerfile,
+                        pull=False,
+                        tag=str(self.language_image.id),
+                        labels={DOCKERFILE_HASH_LABEL: dockerfile_hash},
+                    )
         except (BuildError, APIError) as error:
             self._update_status(ImageStatus.build_failed, failure_message=str(error))
             logger.error(
@@ -116,7 +262,7 @@ class ImageBuilder:
         self.language_image.image_size = self.__get_image_size(image)
         self.language_image.image_architecture = image.attrs.get("Architecture", "")
         self.language_image.docker_image_id = image.id
-        self.language_image.build_logs = list(build_logs)  # type: ignore
+        self.language_image.base_image_digest = self._get_image_digest(base_image)
         self._update_status(ImageStatus.build_succeeded)
 
     def run(self) -> None:
@@ -231,8 +377,10 @@ class ImageBuilder:
         """Removes the Docker image."""
 
         try:
+            # remove the language image tag rather than the image id as the image may
+            # be shared with other language images, it is deleted with its last tag.
             self.docker_client.images.remove(
-                image=self.language_image.docker_image_id,
+                image=str(self.language_image.id),
                 force=True,
                 noprune=False,
             )
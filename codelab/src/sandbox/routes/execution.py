@@ -1,72 +1,160 @@
+from collections.abc import AsyncGenerator
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import Response, StreamingResponse
 from typing import Annotated
+from src.core.pagination import CursorPage
+from src.core.responses import ResponseSerializer
 from src.models import ExerciseSubmission, Task
+from src.sandbox.schemas import ExecutionOutputSchema, TaskPublicSchema
+from src.sandbox.streams import EVENT_STREAM_HEADERS
+from src.sandbox.views import VERSION_HEADER, ExecutionView
 from src.sandbox.services import (
     cancle_queued_exercise_submission_service,
     cancle_queued_task_service,
     create_exercise_submission_service,
     create_task_execution_service,
-    get_exercise_submission_by_id_service,
-    get_task_by_id_service, 
+    get_exercise_submission_view_service,
+    get_exercise_submission_execution_output_service,
+    get_task_view_service,
+    get_task_execution_output_service,
     get_tasks_queue_list_service,
+    stream_exercise_submission_events_service,
+    stream_task_events_service,
 )
 
 
 router = APIRouter()
 
+# tasks and submissions carry large results and logs, they are serialized
+# directly instead of going through FastAPI's validation and encoding.
+task_serializer = ResponseSerializer(Task)
+task_page_serializer = ResponseSerializer(
+    CursorPage[TaskPublicSchema],
+    # leave out the heavy fields that were not included
+    exclude_unset=True,
+)
+submission_serializer = ResponseSerializer(ExerciseSubmission)
+output_serializer = ResponseSerializer(ExecutionOutputSchema)
+
 
-@router.post('/{session_id}/tasks/')
-def create_task_executions(
+@router.post('/{session_id}/tasks/', response_model=Task)
+async def create_task_executions(
     task_execution: Annotated[Task, Depends(create_task_execution_service)]
-) -> Task:
-    return task_execution
+) -> Response:
+    return task_serializer.response(task_execution)
 
 
-@router.get('/{session_id}/tasks/')
-def list_tasks_in_execution_queue(
-    tasks: Annotated[list[Task], Depends(get_tasks_queue_list_service)]
-) -> list[Task]:
+@router.get('/{session_id}/tasks/', response_model=CursorPage[TaskPublicSchema])
+async def list_tasks_in_execution_queue(
+    tasks: Annotated[CursorPage[TaskPublicSchema], Depends(get_tasks_queue_list_service)]
+) -> Response:
     """List all tasks in the execution queue."""
-    return tasks
-
-
-@router.get('/{session_id}/tasks/{task_id}/')
-def get_execution_task(
-    task: Annotated[Task, Depends(get_task_by_id_service)]
-) -> Task:
-    """Get details of a task."""
-    return task
-
-
-@router.delete('/{session_id}/tasks/{task_id}/')
-def cancle_execution_task(
+    return task_page_serializer.response(tasks)
+
+
+@router.get('/{session_id}/tasks/{task_id}/', response_model=Task)
+async def get_execution_task(
+    task: Annotated[ExecutionView, Depends(get_task_view_service)]
+) -> Response:
+    """
+    Get details of a task.
+
+    Pass the returned `X-Version` header as `since` along with `wait` to
+    wait for the next change of the task.
+    """
+    # the view is already serialized, send it as is
+    return Response(
+        content=task.content,
+        media_type="application/json",
+        headers={VERSION_HEADER: str(task.version)},
+    )
+
+
+@router.get('/{session_id}/tasks/{task_id}/events/', response_class=StreamingResponse)
+async def stream_execution_task_events(
+    events: Annotated[AsyncGenerator[str, None], Depends(stream_task_events_service)]
+) -> StreamingResponse:
+    """Stream status changes and execution logs of a task as Server-Sent Events."""
+    return StreamingResponse(
+        events, media_type="text/event-stream", headers=EVENT_STREAM_HEADERS
+    )
+
+
+@router.get('/{session_id}/tasks/{task_id}/outputs/{digest}/', response_model=ExecutionOutputSchema)
+async def get_execution_task_output(
+    output: Annotated[ExecutionOutputSchema, Depends(get_task_execution_output_service)]
+) -> Response:
+    """Read a range of a large std_out / std_err of a task."""
+    return output_serializer.response(output)
+
+
+@router.delete('/{session_id}/tasks/{task_id}/', response_model=Task)
+async def cancle_execution_task(
     task: Annotated[Task, Depends(cancle_queued_task_service)]
-) -> Task:
+) -> Response:
     """Cancel a task from the execution queue."""
-    return task
+    return task_serializer.response(task)
 
 
-@router.post('/{session_id}/submission/')
-def create_exercise_submission(
+@router.post('/{session_id}/submission/', response_model=ExerciseSubmission)
+async def create_exercise_submission(
     submission: Annotated[ExerciseSubmission, Depends(create_exercise_submission_service)]
-) -> ExerciseSubmission:
+) -> Response:
     """Create a new exercise submission."""
-    return submission
+    return submission_serializer.response(submission)
+
+
+@router.get('/{session_id}/submission/{submission_id}/', response_model=ExerciseSubmission)
+async def get_exercise_submission(
+    submission: Annotated[ExecutionView, Depends(get_exercise_submission_view_service)]
+) -> Response:
+    """
+    Get details of an exercise submission.
 
+    Pass the returned `X-Version` header as `since` along with `wait` to
+    wait for the next change of the submission.
+    """
+    # the view is already serialized, send it as is
+    return Response(
+        content=submission.content,
+        media_type="application/json",
+        headers={VERSION_HEADER: str(submission.version)},
+    )
 
-@router.get('/{session_id}/submission/{submission_id}/')
-def get_exercise_submission(
-    submission: Annotated[ExerciseSubmission, Depends(get_exercise_submission_by_id_service)]
-) -> ExerciseSubmission:
-    """Get details of an exercise submission."""
-    return submission
+
+@router.get(
+    '/{session_id}/submission/{submission_id}/events/', response_class=StreamingResponse
+)
+async def stream_exercise_submission_events(
+    events: Annotated[
+        AsyncGenerator[str, None], Depends(stream_exercise_submission_events_service)
+    ]
+) -> StreamingResponse:
+    """Stream status changes and execution logs of a submission as Server-Sent Events."""
+    return StreamingResponse(
+        events, media_type="text/event-stream", headers=EVENT_STREAM_HEADERS
+    )
+
+
+@router.get(
+    '/{session_id}/submission/{submission_id}/outputs/{digest}/',
+    response_model=ExecutionOutputSchema,
+)
+async def get_exercise_submission_output(
+    output: Annotated[
+        ExecutionOutputSchema, Depends(get_exercise_submission_execution_output_service)
+    ]
+) -> Response:
+    """Read a range of a large std_out / std_err of an exercise submission."""
+    return output_serializer.response(output)
 
 
-@router.delete('/{session_id}/submission/{submission_id}/')
-def cancle_exercise_submission(
+@router.delete('/{session_id}/submission/{submission_id}/', response_model=ExerciseSubmission)
+async def cancle_exercise_submission(
     submission: Annotated[ExerciseSubmission, Depends(cancle_queued_exercise_submission_service)]
-) -> ExerciseSubmission:
+) -> Response:
     """Cancel an exercise submission."""
-    return submission
+    return submission_serializer.response(submission)
 
 
@@ -2,12 +2,19 @@ from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends
 
+from src.core.compression import compression
+from src.core.pagination import CursorPage
 from src.models import LanguageImage
-from src.sandbox.schemas import LanguageImagePublicShcema
+from src.sandbox.schemas import (
+    BuildLogSchema,
+    LanguageImageListItemSchema,
+    LanguageImagePublicShcema,
+)
 from src.sandbox.services import (
     cancle_language_image_delation_service,
     create_new_langauge_image_service,
     delete_language_image_service,
+    get_language_image_build_log_service,
     get_language_image_by_id_service,
     list_language_image_services,
     prune_all_language_images_service,
@@ -19,10 +26,15 @@ from src.sandbox.services import (
 router = APIRouter()
 
 
-@router.get("/", response_model=list[LanguageImagePublicShcema])
-def list_language_images(
+@router.get(
+    "/",
+    response_model=CursorPage[LanguageImageListItemSchema],
+    # leave out the heavy fields that were not included
+    response_model_exclude_unset=True,
+)
+async def list_language_images(
     langauge_images: Annotated[
-        list[LanguageImage], Depends(list_language_image_services)
+        CursorPage[LanguageImageListItemSchema], Depends(list_language_image_services)
     ],
 ) -> Any:
     """List all language images."""
@@ -30,7 +42,7 @@ def list_language_images(
 
 
 @router.post("/", response_model=LanguageImagePublicShcema)
-def create_language_image(
+async def create_language_image(
     language_image: Annotated[
         LanguageImage, Depends(create_new_langauge_image_service)
     ],
@@ -40,15 +52,27 @@ def create_language_image(
 
 
 @router.get("/{image_id}/", response_model=LanguageImagePublicShcema)
-def get_language_image_by_id(
+async def get_language_image_by_id(
     language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
 ) -> Any:
     """Get a language image by its ID."""
     return language_image
 
 
+@router.get(
+    "/{image_id}/build-logs/",
+    # logs are read rarely and are very repetitive, trade cpu for a smaller response
+    dependencies=[Depends(compression(compresslevel=6))],
+)
+async def get_language_image_build_log(
+    build_log: Annotated[BuildLogSchema, Depends(get_language_image_build_log_service)],
+) -> BuildLogSchema:
+    """Read a range of the build log of a language image."""
+    return build_log
+
+
 @router.patch("/{image_id}/", response_model=LanguageImagePublicShcema)
-def update_language_image(
+async def update_language_image(
     language_image: Annotated[LanguageImage, Depends(update_language_image_service)],
 ) -> Any:
     """Update a language image.."""
@@ -56,7 +80,7 @@ def update_language_image(
 
 
 @router.delete("/{image_id}/", response_model=LanguageImagePublicShcema)
-def delete_language_image(
+async def delete_language_image(
     language_image: Annotated[LanguageImage, Depends(delete_language_image_service)],
 ) -> Any:
     """Delete a language image."""
@@ -64,7 +88,7 @@ def delete_language_image(
 
 
 @router.post("/{image_id}/cancle-deletion/", response_model=LanguageImagePublicShcema)
-def cancle_langauge_image_deletion(
+async def cancle_langauge_image_deletion(
     language_image: Annotated[
         LanguageImage, Depends(cancle_language_image_delation_service)
     ],
@@ -74,7 +98,7 @@ def cancle_langauge_image_deletion(
 
 
 @router.post("/{image_id}/rebuild/", response_model=LanguageImagePublicShcema)
-def retry_language_build(
+async def retry_language_build(
     language_image: Annotated[
         LanguageImage, Depends(retry_language_image_build_service)
     ],
@@ -84,7 +108,7 @@ def retry_language_build(
 
 
 @router.post("/{image_id}/prune/", response_model=LanguageImagePublicShcema)
-def prune_langauge_image(
+async def prune_langauge_image(
     language_image: Annotated[LanguageImage, Depends(prune_langauge_image_service)],
 ) -> Any:
     """Prune a language image."""
@@ -92,7 +116,7 @@ def prune_langauge_image(
 
 
 @router.delete("/")
-def prune_all_language_images(
+async def prune_all_language_images(
     _: Annotated[None, Depends(prune_all_language_images_service)],
 ) -> Any:
     """Prune all language images."""
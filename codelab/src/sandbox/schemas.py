@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Annotated, Any
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
 from pydantic import (
@@ -13,6 +13,8 @@ from pydantic import (
 )
 from typing_extensions import Self
 
+from src.schemas import DatabaseExecutionResult, ImagePullPolicy, ImageStatus, TaskStatus
+
 
 def _ensure_base_image_is_aphine_based(value: str) -> str:
     """Ensure that the language base image is a alphine based image."""
@@ -59,6 +61,7 @@ class CreateLanguageImageSchema(BaseModel):
     description: str
 
     base_image: Annotated[str, AfterValidator(_ensure_base_image_is_aphine_based)]
+    base_image_pull_policy: ImagePullPolicy = ImagePullPolicy.if_not_present
 
     test_build: bool
     file_extension: str
@@ -102,6 +105,7 @@ class UpdateLanguageSchema(BaseModel):
     version: str | None = None
     description: str | None = None
     base_image: str | None = None
+    base_image_pull_policy: ImagePullPolicy | None = None
     test_build: bool | None = None
     file_extension: str | None = None
     compile_file_extension: str | None = None
@@ -121,8 +125,9 @@ class LanguageImagePublicShcema(BaseModel):
     status: str
     description: str
     base_image: str
+    base_image_pull_policy: ImagePullPolicy
+    base_image_digest: str | None
     docker_image_id: str | None
-    build_logs: JsonValue | None
     push_logs: JsonValue | None
     failure_message: str | None
     test_build: bool
@@ -137,6 +142,8 @@ class LanguageImagePublicShcema(BaseModel):
     entrypoint_script: str | None
     image_size: str | None
     image_architecture: str | None
+    last_used_at: datetime | None
+    execution_count: int
     created_at: datetime
     updated_at: datetime | None
 
@@ -144,6 +151,11 @@ class LanguageImagePublicShcema(BaseModel):
         arbitrary_types_allowed = True
 
 
+class LanguageImageListItemSchema(LanguageImagePublicShcema):
+    # heavy fields, only returned when requested with `include`
+    push_logs: JsonValue | None = None
+
+
 class CreateTaskExecutionSchema(BaseModel):
     excercise_id: UUID
     entry_file_path: NewPath
@@ -162,3 +174,63 @@ class ExecutionLogSchema(BaseModel):
     @field_serializer('timestamp')
     def serialize_timestamp(self, timestamp: datetime, _info: Any) -> str:
         return timestamp.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class ScheduledImageActionReport(BaseModel):
+    image_id: UUID
+    action: ImageStatus
+    outcome: Literal["queued", "removed", "failed", "skipped"]
+    message: str | None = None
+
+
+class BuildLogSchema(BaseModel):
+    offset: int
+    # pass as `offset` to read what was written since
+    next_offset: int
+    size: int
+    content: str
+    # the build is over, nothing more will be written to the log
+    complete: bool
+
+
+class ExecutionOutputChunkSchema(BaseModel):
+    stream: Literal["std_out", "std_err"]
+    content: str
+    # the live output limit was reached, the rest is only in the final result
+    truncated: bool = False
+
+
+class ExecutionEventSchema(BaseModel):
+    request_id: UUID
+    status: TaskStatus
+
+    # position of the log in `execution_logs`, events without a log only change the status
+    log_index: int | None = None
+    log: ExecutionLogSchema | None = None
+
+    # output of the running program, sent while it runs
+    output: ExecutionOutputChunkSchema | None = None
+
+
+class ExecutionOutputSchema(BaseModel):
+    digest: str
+    offset: int
+    size: int
+    content: str
+
+
+class TaskPublicSchema(BaseModel):
+    id: UUID
+    celery_task_id: str | None
+    entry_file_path: str
+    exercise_id: UUID
+    session_id: UUID | None
+    student_id: UUID | None
+    group_id: UUID | None
+    status: TaskStatus
+    created_at: datetime
+    updated_at: datetime | None
+
+    # heavy fields, only returned when requested with `include`
+    execution_logs: list[JsonValue] | None = None
+    results: list[DatabaseExecutionResult] | None = None
@@ -1,14 +1,27 @@
-from typing import Annotated
+import math
+from collections.abc import AsyncGenerator
+from typing import Annotated, Literal
 from uuid import UUID
 
-from fastapi import Body, Depends, HTTPException, Path
-from sqlmodel import Session, col, func, select, update
+from fastapi import Body, Depends, HTTPException, Path, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import selectinload
+from sqlmodel import col, false, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.core.dependecies import (
     require_admin, 
     require_admin_or_student, 
     require_db_session, 
     require_student,
+    require_user_key_claims,
+)
+from src.core.pagination import (
+    CursorPage,
+    PaginationParams,
+    paginate,
+    project_columns,
+    require_pagination_params,
 )
 from src.models import (
     Exercise,
@@ -17,37 +30,63 @@ from src.models import (
     LanguageImage,
     SessionEnrollment,
     Task,
+    TestCaseResult,
     Student,
     Admin,
 )
 from src.models import Session as WorkflowSession
+from src.sandbox.blobs import BlobNotFoundError, read_blob
+from src.sandbox.build_logs import read_build_log
+from src.sandbox.locks import is_image_locked
 from src.sandbox.schemas import (
+    BuildLogSchema,
     CreateExcerciseExecutionSchema,
     CreateLanguageImageSchema,
     CreateTaskExecutionSchema,
+    ExecutionEventSchema,
+    ExecutionOutputSchema,
+    LanguageImageListItemSchema,
+    TaskPublicSchema,
     UpdateLanguageSchema,
 )
-from src.sandbox.tasks import build_language_image_task, program_execution_queue
-from src.schemas import ImageStatus, TaskStatus
-from src.utils import CeleryHelper
+from src.sandbox.streams import publish_execution_event_async, stream_execution_events
+from src.sandbox.views import (
+    CachedExecutionView,
+    ExecutionView,
+    cache_execution_view_async,
+    get_cached_execution_view,
+    get_execution_view_version,
+    invalidate_execution_view_async,
+    wait_for_execution_view_change,
+)
+from src.schemas import DatabaseExecutionResult, ImageStatus, TaskStatus
+from src.core.config import settings
 from src.core.exceptions import APIException
-from src.core.schemas import APIErrorCodes
+from src.core.rate_limit import TokenBucketLimiter
+from src.core.schemas import APIErrorCodes, UserKeyClaims
+from src.core.celery import revoke_task, send_task
 from fastapi import status
 
 
-def create_new_langauge_image_service(
+task_execution_rate_limiter = TokenBucketLimiter(
+    name="task-execution",
+    capacity=settings.TASK_EXECUTION_RATE_LIMIT_BURST,
+    refill_per_second=settings.TASK_EXECUTION_RATE_LIMIT_REFILL_PER_SECOND,
+)
+submission_rate_limiter = TokenBucketLimiter(
+    name="submission",
+    capacity=settings.SUBMISSION_RATE_LIMIT_BURST,
+    refill_per_second=settings.SUBMISSION_RATE_LIMIT_REFILL_PER_SECOND,
+)
+
+
+async def create_new_langauge_image_service(
     admin: Annotated[Admin, Depends(require_admin)],
-    db_session: Annotated[Session, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     image_data: Annotated[CreateLanguageImageSchema, Body()],
 ) -> LanguageImage:
     """Create a new language image."""
 
-    if CeleryHelper.is_being_executed(["build_language_image_task"]):
-        raise HTTPException(
-            status_code=400,
-            detail="Unbale to trigger language build as a build is in progress",
-        )
-
     image = LanguageImage(
         **image_data.model_dump(),
         status=ImageStatus.created,
@@ -55,33 +94,46 @@ def create_new_langauge_image_service(
     )
 
     db_session.add(image)
-    db_session.commit()
-    db_session.refresh(image)
+    await db_session.commit()
+    await db_session.refresh(image)
 
     # enqueue a celery task to build the image asynchronously
-    build_language_image_task.delay(image_id=image.id)
+    send_task("build_language_image_task", kwargs={"image_id": image.id})
     return image
 
 
-def list_language_image_services(
+async def list_language_image_services(
     _: Annotated[Admin, Depends(require_admin)],
-    db_session: Annotated[Session, Depends(require_db_session)],
-) -> list[LanguageImage]:
-    """List all language images."""
-    return db_session.exec(
-        select(LanguageImage).order_by(col(LanguageImage.created_at))
-    ).all()
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    pagination: Annotated[PaginationParams, Depends(require_pagination_params)],
+    include: Annotated[list[Literal["push_logs"]] | None, Query()] = None,
+) -> CursorPage[LanguageImageListItemSchema]:
+    """List language images, push logs are only loaded when included."""
+
+    columns = project_columns(
+        LanguageImage,
+        LanguageImageListItemSchema,
+        include=include or [],
+        exclude=["push_logs"],
+    )
+    return await paginate(
+        db_session,
+        select(*columns),
+        LanguageImage,
+        LanguageImageListItemSchema,
+        pagination,
+    )
 
 
-def get_language_image_by_id_service(
+async def get_language_image_by_id_service(
     _: Annotated[Admin, Depends(require_admin)],
-    db_session: Annotated[Session, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     image_id: Annotated[UUID, Path()],
 ) -> LanguageImage:
     """Get a language image by its ID."""
-    language_image = db_session.exec(
+    language_image = (await db_session.exec(
         select(LanguageImage).where(LanguageImage.id == image_id)
-    ).first()
+    )).first()
 
     if not language_image:
         raise HTTPException(status_code=404, detail="Language image not found")
@@ -89,8 +141,42 @@ def get_language_image_by_id_service(
     return language_image
 
 
-def update_language_image_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_language_image_build_log_service(
+    language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
+    offset: Annotated[int, Query(ge=0)] = 0,
+    length: Annotated[int, Query(gt=0, le=settings.IMAGE_BUILD_LOG_MAX_READ_SIZE)] = (
+        settings.IMAGE_BUILD_LOG_MAX_READ_SIZE
+    ),
+) -> BuildLogSchema:
+    """
+    Read a range of the build log of a language image.
+
+    The log is written while the image builds, poll with the returned
+    `next_offset` until `complete` to tail it.
+    """
+
+    # read the status first so no output is missed when the build ends in between
+    complete = language_image.status not in (
+        ImageStatus.created,
+        ImageStatus.building,
+        ImageStatus.scheduled_for_rebuild,
+    )
+    content, size = await run_in_threadpool(
+        read_build_log, language_image.id, offset, length
+    )
+
+    return BuildLogSchema(
+        offset=offset,
+        next_offset=offset + len(content),
+        size=size,
+        # a range can split a multi-byte character at its edges
+        content=content.decode(errors="replace"),
+        complete=complete,
+    )
+
+
+async def update_language_image_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
     data: Annotated[UpdateLanguageSchema, Body()],
@@ -132,13 +218,13 @@ def update_language_image_service(
     language_image.sqlmodel_update(update_data)
 
     db_session.add(language_image)
-    db_session.commit()
-    db_session.refresh(language_image)
+    await db_session.commit()
+    await db_session.refresh(language_image)
     return language_image
 
 
-def delete_language_image_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def delete_language_image_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
 ) -> LanguageImage:
@@ -157,13 +243,13 @@ def delete_language_image_service(
 
     language_image.status = ImageStatus.scheduled_for_deletion
     db_session.add(language_image)
-    db_session.commit()
-    db_session.refresh(language_image)
+    await db_session.commit()
+    await db_session.refresh(language_image)
     return language_image
 
 
-def cancle_language_image_delation_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def cancle_language_image_delation_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
 ) -> LanguageImage:
@@ -185,13 +271,13 @@ def cancle_language_image_delation_service(
 
     language_image.status = ImageStatus.scheduled_for_rebuild
     db_session.add(language_image)
-    db_session.commit()
+    await db_session.commit()
 
     return language_image
 
 
-def retry_language_image_build_service(
-    _: Annotated[Session, Depends(require_db_session)],
+async def retry_language_image_build_service(
+    _: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
 ) -> LanguageImage:
@@ -208,50 +294,54 @@ def retry_language_image_build_service(
             status_code=status.HTTP_403_FORBIDDEN,
         )
 
-    if CeleryHelper.is_being_executed(["build_language_image_task"]):
+    if await run_in_threadpool(is_image_locked, language_image.id):
         raise APIException(
-            message="Unable to trigger language build as a build is in progress",
+            message="Unable to trigger language build as this image is being built",
             error_code=APIErrorCodes.LANGUAGE_IMAGE_BUILD_IN_PROGRESS,
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    build_language_image_task.delay(image_id=language_image.id)
+    send_task("build_language_image_task", kwargs={"image_id": language_image.id})
     return language_image
 
 
-def prune_langauge_image_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def prune_langauge_image_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     _: Annotated[Admin, Depends(require_admin)],
     language_image: Annotated[LanguageImage, Depends(get_language_image_by_id_service)],
 ) -> LanguageImage:
     """Prune a language image."""
     language_image.status = ImageStatus.scheduled_for_prune
     db_session.add(language_image)
-    db_session.commit()
+    await db_session.commit()
     return language_image
 
 
-def prune_all_language_images_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def prune_all_language_images_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     _: Annotated[bool, Depends(require_admin)],
 ) -> None:
     """Prune all language images."""
-    db_session.exec(
+    await db_session.exec(
         update(LanguageImage)
         .where(LanguageImage.status != ImageStatus.unavailable)
         .values(status=ImageStatus.scheduled_for_prune)
     )
-    db_session.commit()
+    await db_session.commit()
 
 
-def get_session_by_id_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_session_by_id_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session_id: Annotated[UUID, Path()],
 ) -> WorkflowSession:
     """Get a session by its external ID."""
-    session = db_session.exec(
-        select(WorkflowSession).where(WorkflowSession.id == session_id)
-    ).first()
+    session = (await db_session.exec(
+        select(WorkflowSession)
+        .where(WorkflowSession.id == session_id)
+        # the resource configuration is read by the execution services and
+        # relationships cannot be lazy loaded on an async session
+        .options(selectinload(WorkflowSession.configuration))  # type: ignore
+    )).first()
 
     if not session:
         raise APIException(
@@ -263,7 +353,7 @@ def get_session_by_id_service(
     return session
 
 
-def get_active_session_by_id_service(
+async def get_active_session_by_id_service(
     session: Annotated[WorkflowSession, Depends(get_session_by_id_service)],
 ) -> WorkflowSession:
     """Get an active session by its external ID."""
@@ -277,8 +367,8 @@ def get_active_session_by_id_service(
     return session
 
 
-def get_task_by_id_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_task_by_id_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session: Annotated[WorkflowSession, Depends(get_active_session_by_id_service)],
     user: Annotated[Student | Admin, Depends(require_admin_or_student)],
     task_id: Annotated[UUID, Path()],
@@ -290,20 +380,17 @@ def get_task_by_id_service(
     if isinstance(user, Student):
         # if the user is a student, we need to check that the task belongs to the student
         user_args.append(col(Task.student_id) == user.id)
-    elif isinstance(user, Admin):
+    elif isinstance(user, Admin) and session.admin_id != user.id:
         # if the user is an admin, we need to check that the task belongs to the admins session
-        user_args.append(col(WorkflowSession.admin_id) == user.id)
+        user_args.append(false())
 
-    task = db_session.exec(
-        select(Task)
-        .join(Exercise, Task.exercise_id == Exercise.id)
-        .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
-        .where(
+    task = (await db_session.exec(
+        select(Task).where(
             col(Task.id) == task_id,
-            col(WorkflowSession.id) == session.id,
+            col(Task.session_id) == session.id,
             *user_args,
         )
-    ).first()
+    )).first()
 
     if not task:
         raise APIException(
@@ -315,7 +402,73 @@ def get_task_by_id_service(
     return task
 
 
-def get_queued_task_by_id_service(
+def _authorize_cached_view(
+    cached: CachedExecutionView, user: Student | Admin, not_found_message: str
+) -> None:
+    """Apply the ownership checks of the by id services to a cached view."""
+
+    if isinstance(user, Student):
+        allowed = cached.student_id == user.id
+    else:
+        allowed = cached.session_admin_id == user.id
+
+    if not allowed:
+        raise APIException(
+            message=not_found_message,
+            error_code=APIErrorCodes.NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+
+async def _get_task_view(
+    db_session: AsyncSession, user: Student | Admin, session_id: UUID, task_id: UUID
+) -> str:
+    """Get the serialized view of a task from the cache, or the database on a miss."""
+
+    cached = await get_cached_execution_view(Task, task_id, session_id)
+    if cached is not None:
+        _authorize_cached_view(cached, user, "Task not found.")
+        return cached.view
+
+    session = await get_active_session_by_id_service(
+        await get_session_by_id_service(db_session, session_id)
+    )
+    task = await get_task_by_id_service(db_session, session, user, task_id)
+    await cache_execution_view_async(task, session.admin_id)
+    return task.model_dump_json()
+
+
+async def get_task_view_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    user: Annotated[Student | Admin, Depends(require_admin_or_student)],
+    session_id: Annotated[UUID, Path()],
+    task_id: Annotated[UUID, Path()],
+    wait: Annotated[float, Query(ge=0, le=settings.EXECUTION_VIEW_MAX_WAIT_SECONDS)] = 0,
+    since: Annotated[int | None, Query()] = None,
+) -> ExecutionView:
+    """
+    Get the serialized view of a task and its version.
+
+    Views are written through to Redis on every change so polling is served
+    from the cache, the database is only queried on a miss. With `since` and
+    `wait` the request is held until the version differs from `since` or
+    `wait` seconds passed, for clients that can not use the event stream.
+    """
+
+    # read the version first, a view newer than its version only causes an extra poll
+    version = await get_execution_view_version(Task, task_id)
+    content = await _get_task_view(db_session, user, session_id, task_id)
+
+    if wait and since is not None and version == since:
+        # release the connection while waiting, the session reconnects on the re-read
+        await db_session.close()
+        version = await wait_for_execution_view_change(Task, task_id, since, wait)
+        content = await _get_task_view(db_session, user, session_id, task_id)
+
+    return ExecutionView(content=content, version=version)
+
+
+async def get_queued_task_by_id_service(
     task: Annotated[Task, Depends(get_task_by_id_service)],
 ) -> Task:
     """Get a queued task by its ID."""
@@ -329,26 +482,33 @@ def get_queued_task_by_id_service(
     return task
 
 
-def get_tasks_queue_list_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_tasks_queue_list_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session: Annotated[WorkflowSession, Depends(get_active_session_by_id_service)],
     user: Annotated[Student | Admin, Depends(require_admin_or_student)],
-) -> list[Task]:
-    """Get tasks queue list for a session."""
+    pagination: Annotated[PaginationParams, Depends(require_pagination_params)],
+    include: Annotated[list[Literal["execution_logs", "results"]] | None, Query()] = None,
+) -> CursorPage[TaskPublicSchema]:
+    """Get tasks queue list for a session, logs and results are only loaded when included."""
 
     user_args = []
 
     if isinstance(user, Student):
         user_args.append(col(Task.student_id) == user.id)
-    elif isinstance(user, Admin):
-        user_args.append(col(WorkflowSession.admin_id) == user.id)
-
-    return db_session.exec(
-        select(Task)
-        .join(Exercise, Task.exercise_id == Exercise.id)
-        .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
+    elif isinstance(user, Admin) and session.admin_id != user.id:
+        user_args.append(false())
+
+    columns = project_columns(
+        Task,
+        TaskPublicSchema,
+        include=include or [],
+        exclude=["execution_logs", "results"],
+    )
+    return await paginate(
+        db_session,
+        select(*columns)
         .where(
-            col(WorkflowSession.id) == session.id,
+            col(Task.session_id) == session.id,
             col(Task.status).in_(
                 [
                     TaskStatus.queued,
@@ -356,12 +516,50 @@ def get_tasks_queue_list_service(
                 ]
             ),
             *user_args,
+        ),
+        Task,
+        TaskPublicSchema,
+        pagination,
+    )
+
+
+async def _enforce_execution_rate_limit(
+    limiter: TokenBucketLimiter,
+    claims: UserKeyClaims,
+    session_id: UUID,
+) -> None:
+    """Reject the request if the student has no tokens left in the session's bucket."""
+
+    retry_after = await limiter.acquire(f"{session_id}:{claims.user_id}")
+    if retry_after > 0:
+        raise APIException(
+            message="Too many execution requests, please retry later.",
+            error_code=APIErrorCodes.RATE_LIMITED,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(math.ceil(retry_after))},
         )
-    ).all()
 
 
-def create_task_execution_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def require_task_execution_rate_limit(
+    claims: Annotated[UserKeyClaims, Depends(require_user_key_claims)],
+    session_id: Annotated[UUID, Path()],
+) -> None:
+    """Rate limit task executions per student and session, only the user key is checked."""
+    await _enforce_execution_rate_limit(task_execution_rate_limiter, claims, session_id)
+
+
+async def require_submission_rate_limit(
+    claims: Annotated[UserKeyClaims, Depends(require_user_key_claims)],
+    session_id: Annotated[UUID, Path()],
+) -> None:
+    """Rate limit exercise submissions per student and session, only the user key is checked."""
+    await _enforce_execution_rate_limit(submission_rate_limiter, claims, session_id)
+
+
+async def create_task_execution_service(
+    # resolved first so rejected requests never reach the database
+    _: Annotated[None, Depends(require_task_execution_rate_limit)],
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session: Annotated[WorkflowSession, Depends(get_active_session_by_id_service)],
     student: Annotated[Student, Depends(require_student)],
     task_data: Annotated[CreateTaskExecutionSchema, Body()],
@@ -370,12 +568,10 @@ def create_task_execution_service(
 
     # check that the queue has space to take the new task
     if (
-        db_session.exec(
+        (await db_session.exec(
             select(func.count(col(Task.id)))
-            .join(Exercise, Task.exercise_id == Exercise.id)
-            .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
             .where(
-                col(WorkflowSession.id) == session.id,
+                col(Task.session_id) == session.id,
                 col(Task.status).in_(
                     [
                         TaskStatus.queued,
@@ -383,7 +579,7 @@ def create_task_execution_service(
                     ]
                 )
             )
-        ).first()
+        )).first()
         >= session.configuration.max_queue_size
     ):
         raise APIException(
@@ -393,12 +589,12 @@ def create_task_execution_service(
         )
 
     # get excercise
-    excercise = db_session.exec(
+    excercise = (await db_session.exec(
         select(Exercise).where(
             Exercise.id == task_data.excercise_id,
             Exercise.session_id == session.id,
         )
-    ).first()
+    )).first()
 
     if not excercise:
         raise APIException(
@@ -410,15 +606,13 @@ def create_task_execution_service(
     # check if the student has exceeded their task execution threshold for this session
     # we only count tasks that are in queue or where successfully executed
     if (
-        (db_session.exec(
+        ((await db_session.exec(
             select(func.count(col(Task.id)))
-            .join(Exercise, Task.exercise_id == Exercise.id)
-            .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
             .where(
                 col(Task.student_id) == student.id,
-                col(WorkflowSession.id) == session.id,
+                col(Task.session_id) == session.id,
             )
-        ).first() or 0) >= session.configuration.max_number_of_runs
+        )).first() or 0) >= session.configuration.max_number_of_runs
     ):
         raise APIException(
             message="Student has exceeded their task execution threshold for this session",
@@ -427,13 +621,11 @@ def create_task_execution_service(
         )
 
     # check that the student does not have a task currently executing or pending
-    if db_session.exec(
+    if (await db_session.exec(
         select(Task)
-        .join(Exercise, Task.exercise_id == Exercise.id)
-        .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
         .where(
             col(Task.student_id) == student.id,
-            col(WorkflowSession.id) == session.id,
+            col(Task.session_id) == session.id,
             col(Task.status).in_(
                 [
                     TaskStatus.executing,
@@ -441,7 +633,7 @@ def create_task_execution_service(
                 ]
             ),
         )
-    ).first():
+    )).first():
         raise APIException(
             message="Student already has a task in execution queue",
             error_code=APIErrorCodes.TASK_ALREADY_IN_QUEUE,
@@ -453,11 +645,13 @@ def create_task_execution_service(
         status=TaskStatus.queued,
         student_id=student.id,
         exercise_id=excercise.id,
+        session_id=session.id,
         entry_file_path=str(task_data.entry_file_path),
     )
 
     # wait a bit for the request to be done before sending the task to the queue
-    celery_result = program_execution_queue.apply_async(
+    celery_result = send_task(
+        "program_execution_queue",
         countdown=5,
         kwargs={'task_id': task.id},
     )
@@ -466,14 +660,15 @@ def create_task_execution_service(
         task.celery_task_id = celery_result.id
 
     db_session.add(task)
-    db_session.commit()
-    db_session.refresh(task)
+    await db_session.commit()
+    await db_session.refresh(task)
+    await cache_execution_view_async(task, session.admin_id)
 
     return task
 
 
-def cancle_queued_task_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def cancle_queued_task_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     task: Annotated[Task, Depends(get_queued_task_by_id_service)],
     user: Annotated[Student | Admin, Depends(require_admin_or_student)],
 ) -> Task:
@@ -488,18 +683,23 @@ def cancle_queued_task_service(
 
     task.status = TaskStatus.cancelled
     db_session.add(task)
-    db_session.commit()
+    await db_session.commit()
+    await invalidate_execution_view_async(Task, task.id)
+    await publish_execution_event_async(
+        ExecutionEventSchema(request_id=task.id, status=task.status)
+    )
 
     # attempt to cancel the tasks celery process if it exists
-    celery_result = program_execution_queue.AsyncResult(task.celery_task_id)
-    if celery_result:
-        celery_result.revoke(terminate=True)
+    if task.celery_task_id:
+        revoke_task(task.celery_task_id, terminate=True)
 
     return task
 
 
-def create_exercise_submission_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def create_exercise_submission_service(
+    # resolved first so rejected requests never reach the database
+    _: Annotated[None, Depends(require_submission_rate_limit)],
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session: Annotated[WorkflowSession, Depends(get_session_by_id_service)],
     submission_data: Annotated[CreateExcerciseExecutionSchema, Body()],
     student: Annotated[Student, Depends(require_student)],
@@ -516,7 +716,7 @@ def create_exercise_submission_service(
         )
 
     if submission_data.group_id:
-        group_details = db_session.exec(
+        group_details = (await db_session.exec(
             select(Group, SessionEnrollment.is_group_leader)
             .join(SessionEnrollment, Group.id == SessionEnrollment.group_id)
             .where(
@@ -524,7 +724,7 @@ def create_exercise_submission_service(
                 Group.id == submission_data.group_id,
                 Group.session_id == session.id,
             )
-        ).first()
+        )).first()
 
         if not group_details:
             raise APIException(
@@ -543,12 +743,12 @@ def create_exercise_submission_service(
             )
 
     # get excercise
-    excercise = db_session.exec(
+    excercise = (await db_session.exec(
         select(Exercise).where(
             Exercise.id == submission_data.excercise_id,
             Exercise.session_id == session.id,
         )
-    ).first()
+    )).first()
 
     if not excercise:
         raise APIException(
@@ -558,8 +758,9 @@ def create_exercise_submission_service(
         )
 
     # check that we dont have a queued exercise submission from this group / student
-    if db_session.exec(
+    if (await db_session.exec(
         select(ExerciseSubmission).where(
+            ExerciseSubmission.session_id == session.id,
             ExerciseSubmission.group_id == (group.id if group else None),
             ExerciseSubmission.student_id == (student.id if student else None),
             ExerciseSubmission.status.in_(
@@ -570,7 +771,7 @@ def create_exercise_submission_service(
                 ]
             ),
         )
-    ).first():
+    )).first():
         raise APIException(
             message="ExerciseSubmission for student or group already in queue.",
             error_code=APIErrorCodes.TASK_ALREADY_IN_QUEUE,
@@ -582,12 +783,14 @@ def create_exercise_submission_service(
         student_id=student.id if student else None,
         group_id=group.id if group else None,
         exercise_id=excercise.id,
+        session_id=session.id,
         status=TaskStatus.queued,
         entry_file_path=str(submission_data.entry_file_path),
     )
 
     # send execercise submission into queue to be executed
-    celery_result = program_execution_queue.apply_async(
+    celery_result = send_task(
+        "program_execution_queue",
         countdown=5,
         kwargs={'submission_id': submission.id},
     )
@@ -596,15 +799,58 @@ def create_exercise_submission_service(
         submission.celery_task_id = celery_result.id
 
     db_session.add(submission)
-    db_session.commit()
-    db_session.refresh(submission)
-
+    await db_session.commit()
+    await db_session.refresh(submission)
+    await cache_execution_view_async(submission, session.admin_id)
 
     return submission
 
 
-def get_exercise_submission_by_id_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def _get_exercise_submission_view(
+    db_session: AsyncSession, user: Student | Admin, session_id: UUID, submission_id: UUID
+) -> str:
+    """Get the serialized view of a submission from the cache, or the database on a miss."""
+
+    cached = await get_cached_execution_view(ExerciseSubmission, submission_id, session_id)
+    if cached is not None:
+        _authorize_cached_view(cached, user, "Submission not found.")
+        return cached.view
+
+    session = await get_session_by_id_service(db_session, session_id)
+    submission = await get_exercise_submission_by_id_service(
+        db_session, session, user, submission_id
+    )
+    await cache_execution_view_async(submission, session.admin_id)
+    return submission.model_dump_json()
+
+
+async def get_exercise_submission_view_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    user: Annotated[Student | Admin, Depends(require_admin_or_student)],
+    session_id: Annotated[UUID, Path()],
+    submission_id: Annotated[UUID, Path()],
+    wait: Annotated[float, Query(ge=0, le=settings.EXECUTION_VIEW_MAX_WAIT_SECONDS)] = 0,
+    since: Annotated[int | None, Query()] = None,
+) -> ExecutionView:
+    """Get the serialized view of an exercise submission and its version, see `get_task_view_service`."""
+
+    version = await get_execution_view_version(ExerciseSubmission, submission_id)
+    content = await _get_exercise_submission_view(db_session, user, session_id, submission_id)
+
+    if wait and since is not None and version == since:
+        await db_session.close()
+        version = await wait_for_execution_view_change(
+            ExerciseSubmission, submission_id, since, wait
+        )
+        content = await _get_exercise_submission_view(
+            db_session, user, session_id, submission_id
+        )
+
+    return ExecutionView(content=content, version=version)
+
+
+async def get_exercise_submission_by_id_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session: Annotated[WorkflowSession, Depends(get_session_by_id_service)],
     user: Annotated[Student | Admin, Depends(require_admin_or_student)],
     submission_id: Annotated[UUID, Path()],
@@ -615,19 +861,16 @@ def get_exercise_submission_by_id_service(
 
     if isinstance(user, Student):
         user_args.append(col(ExerciseSubmission.student_id) == user.id)
-    elif isinstance(user, Admin):
-        user_args.append(col(WorkflowSession.admin_id) == user.id)
+    elif isinstance(user, Admin) and session.admin_id != user.id:
+        user_args.append(false())
 
-    submission = db_session.exec(
-        select(ExerciseSubmission)
-        .join(Exercise, ExerciseSubmission.exercise_id == Exercise.id)
-        .join(WorkflowSession, Exercise.session_id == WorkflowSession.id)
-        .where(
+    submission = (await db_session.exec(
+        select(ExerciseSubmission).where(
             ExerciseSubmission.id == submission_id,
-            col(WorkflowSession.id) == session.id,
+            col(ExerciseSubmission.session_id) == session.id,
             *user_args,
         )
-    ).first()
+    )).first()
 
     if not submission:
         raise APIException(
@@ -639,8 +882,8 @@ def get_exercise_submission_by_id_service(
     return submission
 
 
-def cancle_queued_exercise_submission_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def cancle_queued_exercise_submission_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session: Annotated[WorkflowSession, Depends(get_session_by_id_service)],
     submission: Annotated[ExerciseSubmission, Depends(get_exercise_submission_by_id_service)],
     user: Annotated[Student | Admin, Depends(require_admin_or_student)],
@@ -660,14 +903,14 @@ def cancle_queued_exercise_submission_service(
 
     # check that the student is the group leader
     if isinstance(user, Student) and submission.group_id is not None:
-        student_enrollment = db_session.exec(
+        student_enrollment = (await db_session.exec(
             select(SessionEnrollment)
             .where(
                 SessionEnrollment.student_id == user.id,
                 SessionEnrollment.session_id == session.id,
                 SessionEnrollment.group_id == submission.group_id,
             )
-        ).first()
+        )).first()
 
         # i.e student is not part of the group
         if student_enrollment is None:
@@ -687,11 +930,102 @@ def cancle_queued_exercise_submission_service(
 
     submission.status = TaskStatus.cancelled
     db_session.add(submission)
-    db_session.commit()
+    await db_session.commit()
+    await invalidate_execution_view_async(ExerciseSubmission, submission.id)
+    await publish_execution_event_async(
+        ExecutionEventSchema(request_id=submission.id, status=submission.status)
+    )
 
     # attempt to cancel the submission celery process if it exists
-    celery_result = program_execution_queue.AsyncResult(submission.celery_task_id)
-    if celery_result:
-        celery_result.revoke(terminate=True)
+    if submission.celery_task_id:
+        revoke_task(submission.celery_task_id, terminate=True)
 
     return submission
+
+
+async def _read_execution_output(
+    results: list[DatabaseExecutionResult] | None,
+    digest: str,
+    offset: int,
+    length: int,
+) -> ExecutionOutputSchema:
+    """Read a range of an execution output referenced by the given results."""
+
+    referenced_blobs = {}
+    for result in results or []:
+        # results are stored as plain dicts in JSON columns
+        result = DatabaseExecutionResult.model_validate(result)
+        for blob in (result.std_out_blob, result.std_err_blob):
+            if blob is not None:
+                referenced_blobs[blob.digest] = blob
+
+    # only outputs of the requested task / submission can be read
+    blob = referenced_blobs.get(digest)
+
+    try:
+        if blob is None:
+            raise BlobNotFoundError(digest)
+
+        content = await run_in_threadpool(read_blob, digest, offset, length)
+    except BlobNotFoundError:
+        raise APIException(
+            message="Execution output not found.",
+            error_code=APIErrorCodes.NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    return ExecutionOutputSchema(
+        digest=digest,
+        offset=offset,
+        size=blob.size,
+        # a range can split a multi-byte character at its edges
+        content=content.decode(errors="replace"),
+    )
+
+
+async def stream_task_events_service(
+    task: Annotated[Task, Depends(get_task_by_id_service)],
+) -> AsyncGenerator[str, None]:
+    """Get the Server-Sent Events stream of a task's status changes and execution logs."""
+
+    # the user is authorized once, the stream itself does not hit the auth queries
+    return stream_execution_events(Task, task.id)
+
+
+async def stream_exercise_submission_events_service(
+    submission: Annotated[ExerciseSubmission, Depends(get_exercise_submission_by_id_service)],
+) -> AsyncGenerator[str, None]:
+    """Get the Server-Sent Events stream of a submission's status changes and execution logs."""
+
+    return stream_execution_events(ExerciseSubmission, submission.id)
+
+
+async def get_task_execution_output_service(
+    task: Annotated[Task, Depends(get_task_by_id_service)],
+    digest: Annotated[str, Path()],
+    offset: Annotated[int, Query(ge=0)] = 0,
+    length: Annotated[int, Query(gt=0, le=settings.EXECUTION_OUTPUT_MAX_READ_SIZE)] = (
+        settings.EXECUTION_OUTPUT_MAX_READ_SIZE
+    ),
+) -> ExecutionOutputSchema:
+    """Read a range of a task's std_out / std_err stored in the blob store."""
+
+    return await _read_execution_output(task.results, digest, offset, length)
+
+
+async def get_exercise_submission_execution_output_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
+    submission: Annotated[ExerciseSubmission, Depends(get_exercise_submission_by_id_service)],
+    digest: Annotated[str, Path()],
+    offset: Annotated[int, Query(ge=0)] = 0,
+    length: Annotated[int, Query(gt=0, le=settings.EXECUTION_OUTPUT_MAX_READ_SIZE)] = (
+        settings.EXECUTION_OUTPUT_MAX_READ_SIZE
+    ),
+) -> ExecutionOutputSchema:
+    """Read a range of a submission's std_out / std_err stored in the blob store."""
+
+    results = (await db_session.exec(
+        select(TestCaseResult.execution_result)
+        .where(col(TestCaseResult.submission_id) == submission.id)
+    )).all()
+    return await _read_execution_output(results, digest, offset, length)
@@ -0,0 +1,237 @@
+import asyncio
+import codecs
+import json
+import threading
+import time
+from collections.abc import AsyncGenerator
+from typing import Literal
+from uuid import UUID
+
+from redis.exceptions import RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.core.config import settings
+from src.core.db import async_engine
+from src.core.redis import get_async_redis_client, get_redis_client
+from src.log import logger
+from src.models import ExerciseSubmission, Task
+from src.sandbox.schemas import (
+    ExecutionEventSchema,
+    ExecutionLogSchema,
+    ExecutionOutputChunkSchema,
+)
+from src.schemas import TaskStatus
+
+EXECUTION_CHANNEL_PREFIX = "codelab:execution-events"
+
+# disable caching and proxy buffering so events are delivered as they are sent
+EVENT_STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# no more events are published once a request is in one of these states
+FINAL_TASK_STATUSES = (TaskStatus.executed, TaskStatus.dropped, TaskStatus.cancelled)
+
+
+def get_execution_channel(request_id: UUID | str) -> str:
+    """Get the pub/sub channel execution events of a task / submission are published to."""
+    return f"{EXECUTION_CHANNEL_PREFIX}:{request_id}"
+
+
+def publish_execution_event(event: ExecutionEventSchema) -> None:
+    """
+    Publish a status change or log line of a task / submission to its subscribers.
+
+    Events are best effort, clients that miss one still get the current state
+    when they (re)connect, so Redis errors never fail the execution.
+    """
+
+    try:
+        get_redis_client().publish(
+            get_execution_channel(event.request_id), event.model_dump_json()
+        )
+    except RedisError as error:
+        logger.warning(f"Unable to publish execution event: {error}")
+
+
+async def publish_execution_event_async(event: ExecutionEventSchema) -> None:
+    """Publish an execution event from the api, see `publish_execution_event`."""
+
+    try:
+        await get_async_redis_client().publish(
+            get_execution_channel(event.request_id), event.model_dump_json()
+        )
+    except RedisError as error:
+        logger.warning(f"Unable to publish execution event: {error}")
+
+
+class ExecutionOutputPublisher:
+    """
+    Publishes the std_out / std_err of a running program as execution events.
+
+    Output is buffered and published at most once every
+    `EXECUTION_OUTPUT_STREAM_INTERVAL_SECONDS`, buffered output is sent by a
+    timer so a program that goes quiet does not look hung. Publishing stops
+    once `EXECUTION_OUTPUT_STREAM_MAX_SIZE` bytes were sent, the full output
+    is still part of the final result.
+    """
+
+    def __init__(self, request_id: UUID) -> None:
+        self.request_id = request_id
+        self._buffers: dict[Literal["std_out", "std_err"], str] = {
+            "std_out": "",
+            "std_err": "",
+        }
+        # chunks can split multi-byte characters
+        self._decoders = {
+            stream: codecs.getincrementaldecoder("utf-8")(errors="replace")
+            for stream in self._buffers
+        }
+        self._published_size = 0
+        self._last_published_at = 0.0
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def write(self, stream: Literal["std_out", "std_err"], data: bytes) -> None:
+        """Add output of the program, it is published once the rate limit allows."""
+
+        with self._lock:
+            if self._published_size >= settings.EXECUTION_OUTPUT_STREAM_MAX_SIZE:
+                return
+
+            self._buffers[stream] += self._decoders[stream].decode(data)
+
+            wait = (
+                self._last_published_at
+                + settings.EXECUTION_OUTPUT_STREAM_INTERVAL_SECONDS
+                - time.monotonic()
+            )
+            if wait <= 0:
+                self._publish()
+            elif self._timer is None:
+                self._timer = threading.Timer(wait, self._publish_pending)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        """Publish all buffered output, called once the program exits."""
+
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._publish()
+
+    def _publish_pending(self) -> None:
+        with self._lock:
+            self._publish()
+
+    def _publish(self) -> None:
+        self._timer = None
+        self._last_published_at = time.monotonic()
+
+        for stream, content in self._buffers.items():
+            if not content:
+                continue
+
+            self._buffers[stream] = ""
+            remaining = settings.EXECUTION_OUTPUT_STREAM_MAX_SIZE - self._published_size
+            if remaining <= 0:
+                continue
+
+            data = content.encode()
+            truncated = len(data) > remaining
+            if truncated:
+                content = data[:remaining].decode(errors="ignore")
+
+            self._published_size += min(len(data), remaining)
+            publish_execution_event(
+                ExecutionEventSchema(
+                    request_id=self.request_id,
+                    status=TaskStatus.executing,
+                    output=ExecutionOutputChunkSchema(
+                        stream=stream, content=content, truncated=truncated
+                    ),
+                )
+            )
+
+
+def _format_event(event: ExecutionEventSchema) -> str:
+    return f"event: execution\ndata: {event.model_dump_json()}\n\n"
+
+
+async def _get_snapshot_events(
+    model: type[Task] | type[ExerciseSubmission], request_id: UUID
+) -> list[ExecutionEventSchema]:
+    """Get the current status and logs of a request as events."""
+
+    async with AsyncSession(async_engine) as db_session:
+        row = (
+            await db_session.exec(
+                select(model.status, model.execution_logs).where(model.id == request_id)  # type: ignore
+            )
+        ).first()
+
+    if row is None:
+        return []
+
+    status, execution_logs = row
+    events = [
+        ExecutionEventSchema(
+            request_id=request_id,
+            status=status,
+            log_index=index,
+            log=ExecutionLogSchema.model_validate(log),
+        )
+        for index, log in enumerate(execution_logs)
+    ]
+    return events or [ExecutionEventSchema(request_id=request_id, status=status)]
+
+
+async def stream_execution_events(
+    model: type[Task] | type[ExerciseSubmission], request_id: UUID
+) -> AsyncGenerator[str, None]:
+    """
+    Stream the status changes and log lines of a task / submission as Server-Sent Events.
+
+    The current state is sent first, followed by the events published while the
+    request runs. The stream ends once the request reaches a final status.
+    """
+
+    pubsub = get_async_redis_client().pubsub()
+    try:
+        # subscribe before reading the current state so no event is missed,
+        # events already included in the state are skipped by their log index.
+        await pubsub.subscribe(get_execution_channel(request_id))
+
+        snapshot = await _get_snapshot_events(model, request_id)
+        for event in snapshot:
+            yield _format_event(event)
+
+        if not snapshot or snapshot[-1].status in FINAL_TASK_STATUSES:
+            return
+
+        next_log_index = sum(event.log is not None for event in snapshot)
+        deadline = time.monotonic() + settings.EXECUTION_EVENTS_MAX_STREAM_SECONDS
+
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.EXECUTION_EVENTS_KEEPALIVE_SECONDS,
+            )
+            if message is None:
+                # keep idle connections open through proxies
+                yield ": keep-alive\n\n"
+                continue
+
+            event = ExecutionEventSchema.model_validate(json.loads(message["data"]))
+            if event.log_index is not None:
+                if event.log_index < next_log_index:
+                    continue
+                next_log_index = event.log_index + 1
+
+            yield _format_event(event)
+            if event.status in FINAL_TASK_STATUSES:
+                return
+    except (RedisError, asyncio.TimeoutError) as error:
+        logger.warning(f"Execution event stream of {request_id} closed: {error}")
+    finally:
+        await pubsub.aclose()
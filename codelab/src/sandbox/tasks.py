@@ -1,59 +1,119 @@
-from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any
 from uuid import UUID
 
-from docker.errors import DockerException
+from celery import Task as CeleryTask
+from docker.errors import DockerException, ImageNotFound
 from docker.models.containers import Container
-from sqlmodel import Session, col, select
+from sqlmodel import Session, and_, col, func, or_, select, update
 
 from src.core.config import settings
 from src.core.db import engine
 from src.core.docker import get_shared_docker_client
 from src.external.exceptions import PullRepositoryException
 from src.log import logger
-from src.models import ExerciseSubmission, LanguageImage, Task
+from src.models import ExerciseSubmission, LanguageImage, Task, TestCaseResult
 from src.models import Session as WorkflowSession
+from src.sandbox.blobs import offload_execution_result
+from src.sandbox.context import ExecutionContext, TestCaseContext, load_execution_request
+from src.sandbox.locks import (
+    BuildSlotUnavailableError,
+    ImageBuildLockedError,
+    image_build_slot,
+    image_lock,
+    is_image_locked,
+)
 from src.sandbox.manager import ExecutionFailedError, ResourceManager
 from src.sandbox.ochestator.image import ImageBuilder
-from src.sandbox.schemas import ExecutionLogSchema
+from src.sandbox.schemas import (
+    ExecutionEventSchema,
+    ExecutionLogSchema,
+    ScheduledImageActionReport,
+)
+from src.sandbox.streams import publish_execution_event
+from src.sandbox.views import cache_execution_view
 from src.sandbox.types import CONTAINER_LABEL
-from src.schemas import ImageStatus, TaskStatus
+from src.schemas import DatabaseExecutionResult, ImageStatus, SessionStatus, TaskStatus
 from src.utils import CeleryHelper
 from src.worker import celery_app
 from src.external.utils import pull_excercise_repository
 
+# executions on images in these states wait for the image to be (re)built
+IMAGE_PENDING_BUILD_STATUSES = (
+    ImageStatus.unavailable,
+    ImageStatus.created,
+    ImageStatus.scheduled_for_rebuild,
+    ImageStatus.building,
+    ImageStatus.build_succeeded,
+    ImageStatus.testing,
+)
+
 
 @celery_app.task(
     name="build_language_image_task",
     queue=settings.CELERY_EXECUTION_QUEUE,
+    bind=True,
+    max_retries=None,
 )
-def build_language_image_task(image_id: UUID) -> None:
-    """Build a language image."""
+def build_language_image_task(self: CeleryTask, image_id: UUID) -> None:
+    """
+    Build a language image.
 
-    # do not build while pruning containers
+    Different images are built in parallel up to `MAX_CONCURRENT_IMAGE_BUILDS`,
+    the task is retried later when all build slots are taken or containers
+    are being pruned.
+    """
+
+    # do not build while pruning containers, the build is retried so images
+    # claimed for it do not stay in the created status.
     if CeleryHelper.is_being_executed(["prune_all_containers_task"]):
-        return
+        raise self.retry(countdown=settings.IMAGE_BUILD_RETRY_DELAY_SECONDS)
 
-    with Session(engine) as db_session:
-        language_image = db_session.exec(
-            select(LanguageImage).where(LanguageImage.id == image_id)
-        ).first()
+    try:
+        with image_lock(image_id), image_build_slot():
+            with Session(engine) as db_session:
+                language_image = db_session.exec(
+                    select(LanguageImage).where(LanguageImage.id == image_id)
+                ).first()
+
+                if not language_image:
+                    return
+
+                # create and run a new Docker image builder
+                builder = ImageBuilder(db_session, language_image)
+                builder.run()
+    except ImageBuildLockedError:
+        # a build holding the lock moves the image out of created, anything
+        # else (e.g a removal check) only holds it briefly so try again.
+        with Session(engine) as db_session:
+            image_status = db_session.exec(
+                select(LanguageImage.status).where(LanguageImage.id == image_id)
+            ).first()
 
-        if not language_image:
-            return
+        if image_status == ImageStatus.created:
+            raise self.retry(countdown=settings.IMAGE_BUILD_RETRY_DELAY_SECONDS)
+
+        logger.info(f"Language image {image_id} is already being built, skipping.")
+    except BuildSlotUnavailableError:
+        raise self.retry(countdown=settings.IMAGE_BUILD_RETRY_DELAY_SECONDS)
 
-        # create and run a new Docker image builder
-        builder = ImageBuilder(db_session, language_image)
-        builder.run()
+
+def _is_stale_build_claim() -> Any:
+    """Condition matching images claimed for a build that did not start within the claim timeout."""
+
+    claimed_at = func.coalesce(col(LanguageImage.updated_at), col(LanguageImage.created_at))
+    return and_(
+        col(LanguageImage.status) == ImageStatus.created,
+        claimed_at < datetime.now() - timedelta(seconds=settings.IMAGE_BUILD_CLAIM_TIMEOUT_SECONDS),
+    )
 
 
 @celery_app.task(name="cleanup_handing_builds_tasks")
 def cleanup_handing_builds_tasks() -> None:
     """Mark all hanging langauge builds as  failed."""
 
-    # first check that no build is in progress
-    if CeleryHelper.is_being_executed(["build_language_image_task"]):
-        return
-
     # get all hanging builds and mark them as failed
     with Session(engine) as db_session:
         for language_image in db_session.exec(
@@ -66,6 +126,10 @@ def cleanup_handing_builds_tasks() -> None:
                 )
             )
         ).all():
+            # builds holding the image lock are still in progress
+            if is_image_locked(language_image.id):
+                continue
+
             corresponding_failed_status = {
                 ImageStatus.building: ImageStatus.build_failed,
                 ImageStatus.testing: ImageStatus.testing_failed,
@@ -85,15 +149,75 @@ def cleanup_handing_builds_tasks() -> None:
             db_session.add(language_image)
             db_session.commit()
 
+        # claimed builds whose task was lost (e.g the worker died) are
+        # scheduled again, the scheduler then queues a new build.
+        stale_claims = db_session.exec(  # type: ignore
+            update(LanguageImage)
+            .where(_is_stale_build_claim())
+            .values(status=ImageStatus.scheduled_for_rebuild, updated_at=datetime.now())
+        ).rowcount
+        db_session.commit()
+
+        if stale_claims:
+            logger.info(f"Scheduled {stale_claims} language images with a stale build claim for rebuild.")
+
+
+def _execute_scheduled_removal(
+    image_id: UUID, action: ImageStatus
+) -> ScheduledImageActionReport:
+    """Remove the Docker image of a language image scheduled for deletion or prune."""
+
+    report = ScheduledImageActionReport(image_id=image_id, action=action, outcome="skipped")
+
+    try:
+        # never remove an image while it is being built
+        with image_lock(image_id), Session(engine) as db_session:
+            language_image = db_session.exec(
+                select(LanguageImage).where(LanguageImage.id == image_id)
+            ).first()
+
+            # the action may have been cancelled since it was scheduled
+            if not language_image or language_image.status != action:
+                report.message = "The action is no longer scheduled."
+                return report
+
+            if not ImageBuilder(db_session, language_image).remove():
+                language_image.failure_message = "Failed to remove the Docker image, retrying later."
+                db_session.add(language_image)
+                db_session.commit()
+
+                report.outcome = "failed"
+                report.message = language_image.failure_message
+                return report
+
+            if action == ImageStatus.scheduled_for_deletion:
+                db_session.delete(language_image)
+            else:
+                language_image.status = ImageStatus.unavailable
+                db_session.add(language_image)
+            db_session.commit()
+
+            report.outcome = "removed"
+    except ImageBuildLockedError:
+        report.message = "The image is being built."
+
+    return report
+
 
 @celery_app.task(name="execute_scheduled_build_actions_task")
-def execute_scheduled_build_actions_task() -> None:
-    """Execute scheduled build actions."""
+def execute_scheduled_build_actions_task() -> list[dict[str, Any]]:
+    """
+    Execute scheduled build actions.
+
+    All pending actions are handled in one run, rebuilds are sent to the build
+    queue and removals run concurrently. Returns a report of each action.
+    """
+
+    reports: list[ScheduledImageActionReport] = []
 
-    # get all scheduled builds and execute them
     with Session(engine) as db_session:
-        language_image = db_session.exec(
-            select(LanguageImage)
+        language_images = db_session.exec(
+            select(LanguageImage.id, LanguageImage.status)
             .filter(
                 col(LanguageImage.status).in_(
                     [
@@ -104,36 +228,173 @@ def execute_scheduled_build_actions_task() -> None:
                 )
             )
             .order_by(col(LanguageImage.updated_at))
-        ).first()
+            .limit(settings.SCHEDULED_IMAGE_ACTIONS_BATCH_SIZE)
+        ).all()
+
+        removals = []
+        for image_id, action in language_images:
+            if action != ImageStatus.scheduled_for_rebuild:
+                removals.append((image_id, action))
+                continue
+
+            # claim the rebuild so it is only queued once, even if the build
+            # has not started by the next run.
+            claimed = db_session.exec(  # type: ignore
+                update(LanguageImage)
+                .where(
+                    col(LanguageImage.id) == image_id,
+                    col(LanguageImage.status) == ImageStatus.scheduled_for_rebuild,
+                )
+                .values(status=ImageStatus.created, updated_at=datetime.now())
+            ).rowcount
+            db_session.commit()
 
-        if not language_image:
-            return
+            if claimed:
+                build_language_image_task.delay(image_id=image_id)
 
-        # ensuer that its moved to the bottom of the queue after this attempt
-        language_image.updated_at = datetime.now()
-        db_session.add(language_image)
-        db_session.commit()
+            reports.append(
+                ScheduledImageActionReport(
+                    image_id=image_id,
+                    action=action,
+                    outcome="queued" if claimed else "skipped",
+                )
+            )
 
-        if language_image.status == ImageStatus.scheduled_for_rebuild:
-            # first check that no build is in progress
-            if not CeleryHelper.is_being_executed(["build_language_image_task"]):
-                build_language_image_task.delay(image_id=language_image.id)
-            return
+    if removals:
+        with ThreadPoolExecutor(
+            max_workers=settings.SCHEDULED_IMAGE_REMOVAL_CONCURRENCY
+        ) as executor:
+            reports.extend(
+                executor.map(lambda removal: _execute_scheduled_removal(*removal), removals)
+            )
 
-        if language_image.status == ImageStatus.scheduled_for_deletion:
-            builder = ImageBuilder(db_session, language_image)
-            successful = builder.remove()
-            if successful:
-                db_session.delete(language_image)
-                db_session.commit()
+    for report in reports:
+        logger.info(
+            f"Scheduled {report.action} of language image {report.image_id}: {report.outcome}",
+            extra={"image_id": report.image_id, "message": report.message},
+        )
 
-        if language_image.status == ImageStatus.scheduled_for_prune:
-            builder = ImageBuilder(db_session, language_image)
-            successful = builder.remove()
-            if successful:
-                language_image.status = ImageStatus.unavailable
-                db_session.add(language_image)
-                db_session.commit()
+    return [report.model_dump(mode="json") for report in reports]
+
+
+def _evict_language_image(image_id: UUID) -> bool:
+    """Remove the Docker image of an available language image and mark it unavailable."""
+
+    try:
+        with image_lock(image_id), Session(engine) as db_session:
+            language_image = db_session.exec(
+                select(LanguageImage).where(
+                    LanguageImage.id == image_id,
+                    LanguageImage.status == ImageStatus.available,
+                )
+            ).first()
+
+            if not language_image or not ImageBuilder(db_session, language_image).remove():
+                return False
+
+            language_image.status = ImageStatus.unavailable
+            db_session.add(language_image)
+            db_session.commit()
+            return True
+    except ImageBuildLockedError:
+        return False
+
+
+@celery_app.task(name="collect_unused_language_images_task")
+def collect_unused_language_images_task() -> list[str]:
+    """
+    Evict the least recently used language images until they fit the disk budget.
+
+    Only available images that no creating, created or ongoing session uses are
+    evicted. They are marked unavailable and rebuilt when a program needs them.
+    Returns the ids of the evicted images.
+    """
+
+    client = get_shared_docker_client()
+
+    with Session(engine) as db_session:
+        language_images = db_session.exec(
+            select(LanguageImage.id, LanguageImage.docker_image_id)
+            .where(LanguageImage.status == ImageStatus.available)
+        ).all()
+
+        # language images built from identical Dockerfiles share a Docker image,
+        # its space is only freed when the last of them is evicted.
+        sizes: dict[str, int] = {}
+        sharing_images: dict[str, set[UUID]] = defaultdict(set)
+        for image_id, docker_image_id in language_images:
+            if not docker_image_id:
+                continue
+
+            try:
+                if docker_image_id not in sizes:
+                    sizes[docker_image_id] = client.images.get(docker_image_id).attrs.get("Size", 0)
+            except ImageNotFound:
+                continue
+
+            sharing_images[docker_image_id].add(image_id)
+
+        disk_usage = sum(sizes.values())
+        if disk_usage <= settings.LANGUAGE_IMAGE_DISK_BUDGET_BYTES:
+            return []
+
+        used_by_sessions = select(WorkflowSession.language_image_id).where(
+            col(WorkflowSession.status).in_(
+                [SessionStatus.creating, SessionStatus.created, SessionStatus.ongoing]
+            )
+        )
+        candidates = db_session.exec(
+            select(LanguageImage.id, LanguageImage.docker_image_id)
+            .where(
+                LanguageImage.status == ImageStatus.available,
+                col(LanguageImage.id).not_in(used_by_sessions),
+            )
+            # images that were never used go first
+            .order_by(
+                col(LanguageImage.last_used_at).asc().nulls_first(),
+                col(LanguageImage.created_at),
+            )
+        ).all()
+
+    evicted: list[str] = []
+    for image_id, docker_image_id in candidates:
+        if disk_usage <= settings.LANGUAGE_IMAGE_DISK_BUDGET_BYTES:
+            break
+
+        if not _evict_language_image(image_id):
+            continue
+
+        evicted.append(str(image_id))
+        if docker_image_id in sizes:
+            sharing_images[docker_image_id].discard(image_id)
+            if not sharing_images[docker_image_id]:
+                disk_usage -= sizes.pop(docker_image_id)
+
+    logger.info(
+        f"Evicted {len(evicted)} unused language images, "
+        f"{disk_usage} bytes used of {settings.LANGUAGE_IMAGE_DISK_BUDGET_BYTES}.",
+        extra={"image_ids": evicted},
+    )
+    return evicted
+
+
+def _schedule_evicted_image_rebuild(db_session: Session, image_id: UUID) -> None:
+    """Queue a build of an evicted (unavailable) language image, or one whose build claim is stale."""
+
+    # only the first execution waiting on the image queues the build, a claim
+    # whose build never started is taken over so waiting executions are not dropped.
+    claimed = db_session.exec(  # type: ignore
+        update(LanguageImage)
+        .where(
+            col(LanguageImage.id) == image_id,
+            or_(col(LanguageImage.status) == ImageStatus.unavailable, _is_stale_build_claim()),
+        )
+        .values(status=ImageStatus.created, updated_at=datetime.now())
+    ).rowcount
+    db_session.commit()
+
+    if claimed:
+        build_language_image_task.delay(image_id=image_id)
 
 
 @celery_app.task(name="prune_all_containers_task")
@@ -170,26 +431,65 @@ def prune_all_containers_task(lable: CONTAINER_LABEL | None = None) -> None:
 def _update_execution_log(
     db_session: Session, 
     request: Task | ExerciseSubmission,
+    context: ExecutionContext,
     message: str,
 ) -> None:
     """Update task execution log."""
+    execution_log = ExecutionLogSchema(timestamp=str(datetime.now()), message=message)
     execution_logs = list(request.execution_logs)
-    execution_logs.append(
-        ExecutionLogSchema(
-            timestamp=str(datetime.now()), message=message
-        ).model_dump()        
-    )
+    execution_logs.append(execution_log.model_dump())
     request.execution_logs = execution_logs
     db_session.add(request)
     db_session.commit()
     db_session.refresh(request)
 
+    cache_execution_view(request, context.session_admin_id)
+
+    # status changes are always logged, so this feeds the event streams both
+    publish_execution_event(
+        ExecutionEventSchema(
+            request_id=request.id,
+            status=request.status,
+            log_index=len(execution_logs) - 1,
+            log=execution_log,
+        )
+    )
+
+
+def _build_test_case_results(
+    submission_id: UUID,
+    results: list[DatabaseExecutionResult],
+    test_cases: tuple[TestCaseContext, ...],
+) -> list[TestCaseResult]:
+    """
+    Build the test case results of a submission, large outputs are moved to the blob store.
+
+    Results are stored ungraded, whether a test case passed is left to grading.
+    """
+
+    test_case_ids = {str(test_case.id) for test_case in test_cases}
+
+    return [
+        TestCaseResult(
+            submission_id=submission_id,
+            test_case_id=UUID(result.test_case_id),
+            passed=False,
+            execution_result=offload_execution_result(result).model_dump(),
+        )
+        for result in results
+        # exercises without test cases have a single result that is not stored
+        if result.test_case_id in test_case_ids
+    ]
+
 
 @celery_app.task(
     name="program_execution_queue",
     queue=settings.CELERY_EXECUTION_QUEUE,
+    bind=True,
+    max_retries=None,
 )
 def program_execution_queue(
+    self: CeleryTask,
     task_id: UUID | None = None, 
     submission_id: UUID | None = None
 ) -> None:
@@ -198,20 +498,11 @@ def program_execution_queue(
     assert task_id is not None or submission_id is not None, "task_id or submission_id must be provided"
 
     with Session(engine) as db_session:
-        request: Task | ExerciseSubmission | None = None
-        
-        if task_id:
-            request = db_session.exec(
-                select(Task).where(Task.id == task_id, Task.status == TaskStatus.queued)
-            ).first()
-        
-        elif submission_id:
-            request = db_session.exec(
-                select(ExerciseSubmission).where(
-                    ExerciseSubmission.id == submission_id, 
-                    ExerciseSubmission.status == TaskStatus.queued,
-                )
-            ).first() 
+        request = load_execution_request(
+            db_session,
+            task_id=task_id,
+            submission_id=submission_id,
+        )
 
         if not request:
             logger.error(
@@ -224,11 +515,44 @@ def program_execution_queue(
             )
             return
 
+        # snapshot everything needed for the execution before the request is
+        # expired by the commits below, so nothing is lazy loaded while running
+        context = ExecutionContext.from_request(request)
+
+        # wait for evicted or rebuilding images to be available again
+        if context.language_image.status in IMAGE_PENDING_BUILD_STATUSES:
+            _schedule_evicted_image_rebuild(db_session, context.language_image.id)
+
+            if self.request.retries < settings.EVICTED_IMAGE_REBUILD_MAX_RETRIES:
+                raise self.retry(countdown=settings.IMAGE_BUILD_RETRY_DELAY_SECONDS)
+
+            request.status = TaskStatus.dropped
+            _update_execution_log(
+                db_session=db_session,
+                request=request,
+                context=context,
+                message='Service error: Aborting, the language image is not available.',
+            )
+            return
+
+        # record the usage in the same commit as the status change
+        db_session.exec(  # type: ignore
+            update(LanguageImage)
+            .where(col(LanguageImage.id) == context.language_image.id)
+            .values(
+                last_used_at=datetime.now(),
+                execution_count=col(LanguageImage.execution_count) + 1,
+                # usage is not a change of the image itself
+                updated_at=col(LanguageImage.updated_at),
+            )
+        )
+
         # set task status to executing
         request.status = TaskStatus.executing
         _update_execution_log(
             db_session=db_session,
             request=request,
+            context=context,
             message='Execution started.',
         )
 
@@ -238,15 +562,17 @@ def program_execution_queue(
             _update_execution_log(
                 db_session=db_session,
                 request=request,
+                context=context,
                 message='Pulling code repository.',
             )
             code_repository = pull_excercise_repository(
-                request.exercise_id, 
-                request.exercise.session_id,
+                context.exercise_id, 
+                context.session_id,
             )
             _update_execution_log(
                 db_session=db_session,
                 request=request,
+                context=context,
                 message='Repository pulled successfully.',
             )
         except PullRepositoryException as error:
@@ -256,7 +582,7 @@ def program_execution_queue(
                 extra={
                     'task_id': str(task_id),
                     'submission_id': str(submission_id),
-                    "session_id": str(request.exercise.session_id),
+                    "session_id": str(context.session_id),
                     "error_message": error.message,
                 }
             )
@@ -264,6 +590,7 @@ def program_execution_queue(
             request.status = TaskStatus.dropped
             _update_execution_log(
                 request=request,
+                context=context,
                 db_session=db_session,
                 message='Service error. Aboriting, failed to pull code repository.',
             )
@@ -271,6 +598,7 @@ def program_execution_queue(
 
         _update_execution_log(
             request=request,
+            context=context,
             db_session=db_session,
             message='Executing program.',
         )
@@ -278,24 +606,33 @@ def program_execution_queue(
         try:
             manager = ResourceManager()
             execution_result = manager.execute(
-                request=request,
+                context=context,
                 code_repository=code_repository, 
             )
 
-            request.results = [
-                result.model_dump()
-                for result in execution_result
-            ]
+            # submission results are stored per test case, the output
+            # endpoint reads the blob references from them.
+            if isinstance(request, ExerciseSubmission):
+                db_session.add_all(
+                    _build_test_case_results(request.id, execution_result, context.test_cases)
+                )
+            else:
+                request.results = [
+                    offload_execution_result(result).model_dump()
+                    for result in execution_result
+                ]
             request.status = TaskStatus.executed
             _update_execution_log(
                 db_session=db_session,
                 request=request,
+                context=context,
                 message='Execution completed.',
             )
         except ExecutionFailedError as error:
             request.status = TaskStatus.dropped
             _update_execution_log(
                 request=request,
+                context=context,
                 db_session=db_session,
                 message=f'Service error: Aborting, failed to execute program. {error}',
             )
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from uuid import UUID
+
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+
+from src.core.config import settings
+from src.core.redis import get_async_redis_client, get_redis_client
+from src.log import logger
+from src.models import ExerciseSubmission, Task
+from src.sandbox.streams import get_execution_channel
+
+EXECUTION_VIEW_PREFIX = "codelab:execution-view"
+
+# response header holding the version of a view, sent back as `since` to wait for changes
+VERSION_HEADER = "X-Version"
+
+
+class CachedExecutionView(BaseModel):
+    """A serialized task / submission with the fields needed to authorize reading it."""
+
+    view: str
+    session_id: UUID | None
+    session_admin_id: UUID
+    student_id: UUID | None
+
+
+class ExecutionView(BaseModel):
+    """A serialized task / submission and the version of it."""
+
+    content: str
+    version: int
+
+
+def _get_view_key(
+    model: type[Task] | type[ExerciseSubmission], request_id: UUID | str
+) -> str:
+    return f"{EXECUTION_VIEW_PREFIX}:{model.__tablename__}:{request_id}"
+
+
+def _get_ended_session_key(session_id: UUID | str) -> str:
+    return f"{EXECUTION_VIEW_PREFIX}:ended-session:{session_id}"
+
+
+def _get_version_key(
+    model: type[Task] | type[ExerciseSubmission], request_id: UUID | str
+) -> str:
+    # kept apart from the view so invalidating the view still advances the version
+    return f"{_get_view_key(model, request_id)}:version"
+
+
+def _build_view_mapping(
+    request: Task | ExerciseSubmission, session_admin_id: UUID
+) -> dict[str, str]:
+    return {
+        "view": request.model_dump_json(),
+        "session_id": str(request.session_id or ""),
+        "session_admin_id": str(session_admin_id),
+        "student_id": str(request.student_id or ""),
+    }
+
+
+def cache_execution_view(
+    request: Task | ExerciseSubmission, session_admin_id: UUID
+) -> None:
+    """
+    Write the view of a task / submission to the cache, called on every change.
+
+    Entries expire after `EXECUTION_VIEW_CACHE_TTL_SECONDS` so changes that do not
+    write through (e.g bulk updates) are eventually picked up. Redis errors are
+    logged and ignored, readers fall back to the database.
+    """
+
+    key = _get_view_key(type(request), request.id)
+    version_key = _get_version_key(type(request), request.id)
+    try:
+        pipeline = get_redis_client().pipeline()
+        pipeline.hset(key, mapping=_build_view_mapping(request, session_admin_id))
+        pipeline.expire(key, settings.EXECUTION_VIEW_CACHE_TTL_SECONDS)
+        pipeline.incr(version_key)
+        pipeline.expire(version_key, settings.EXECUTION_VIEW_CACHE_TTL_SECONDS)
+        pipeline.execute()
+    except RedisError as error:
+        logger.warning(f"Unable to cache the view of {key}: {error}")
+
+
+async def cache_execution_view_async(
+    request: Task | ExerciseSubmission, session_admin_id: UUID
+) -> None:
+    """Write the view of a task / submission to the cache from the api, see `cache_execution_view`."""
+
+    key = _get_view_key(type(request), request.id)
+    version_key = _get_version_key(type(request), request.id)
+    try:
+        pipeline = get_async_redis_client().pipeline()
+        pipeline.hset(key, mapping=_build_view_mapping(request, session_admin_id))
+        pipeline.expire(key, settings.EXECUTION_VIEW_CACHE_TTL_SECONDS)
+        pipeline.incr(version_key)
+        pipeline.expire(version_key, settings.EXECUTION_VIEW_CACHE_TTL_SECONDS)
+        await pipeline.execute()
+    except RedisError as error:
+        logger.warning(f"Unable to cache the view of {key}: {error}")
+
+
+async def invalidate_execution_view_async(
+    model: type[Task] | type[ExerciseSubmission], request_id: UUID
+) -> None:
+    """Remove the cached view of a task / submission, its version is advanced."""
+
+    key = _get_view_key(model, request_id)
+    version_key = _get_version_key(model, request_id)
+    try:
+        pipeline = get_async_redis_client().pipeline()
+        pipeline.delete(key)
+        pipeline.incr(version_key)
+        pipeline.expire(version_key, settings.EXECUTION_VIEW_CACHE_TTL_SECONDS)
+        await pipeline.execute()
+    except RedisError as error:
+        logger.warning(f"Unable to invalidate the view of {key}: {error}")
+
+
+async def get_cached_execution_view(
+    model: type[Task] | type[ExerciseSubmission], request_id: UUID, session_id: UUID
+) -> CachedExecutionView | None:
+    """
+    Get the cached view of a task / submission of a session, None on a miss.
+
+    Views of a session that ended are a miss as well, so the session checks
+    of the database path apply to them.
+    """
+
+    try:
+        pipeline = get_async_redis_client().pipeline()
+        pipeline.hgetall(_get_view_key(model, request_id))
+        pipeline.exists(_get_ended_session_key(session_id))
+        entry, session_ended = await pipeline.execute()
+    except RedisError as error:
+        logger.warning(f"Unable to read the cached view of {request_id}: {error}")
+        return None
+
+    if not entry or session_ended:
+        return None
+
+    fields = {key.decode(): value.decode() or None for key, value in entry.items()}
+    cached = CachedExecutionView.model_validate(fields)
+    return cached if cached.session_id == session_id else None
+
+
+def invalidate_session_execution_views(session_id: UUID) -> None:
+    """
+    Stop serving the cached views of the tasks / submissions of an ended session.
+
+    The marker outlives every view cached before it was set, the views are
+    then dropped by their own expiry.
+    """
+
+    key = _get_ended_session_key(session_id)
+    try:
+        get_redis_client().set(key, 1, ex=2 * settings.EXECUTION_VIEW_CACHE_TTL_SECONDS)
+    except RedisError as error:
+        logger.warning(
+            f"Unable to invalidate the views of session {session_id}: {error}"
+        )
+
+
+async def get_execution_view_version(
+    model: type[Task] | type[ExerciseSubmission], request_id: UUID
+) -> int:
+    """
+    Get the version of a task / submission view, it advances on every change.
+
+    Versions expire with the cached views, a version that went back to 0
+    is a change as well for clients waiting on it.
+    """
+
+    try:
+        version = await get_async_redis_client().get(
+            _get_version_key(model, request_id)
+        )
+    except RedisError as error:
+        logger.warning(f"Unable to read the view version of {request_id}: {error}")
+        return 0
+
+    return int(version or 0)
+
+
+async def wait_for_execution_view_change(
+    model: type[Task] | type[ExerciseSubmission],
+    request_id: UUID,
+    since: int,
+    timeout: float,
+) -> int:
+    """
+    Wait until the version of a task / submission view differs from `since`.
+
+    Changes are always published to the request's execution event channel, so
+    the version is only read again when an event arrives. Returns the current
+    version once it changed or the timeout expired.
+    """
+
+    deadline = time.monotonic() + timeout
+    pubsub = get_async_redis_client().pubsub()
+    try:
+        # subscribe before reading the version so no change is missed
+        await pubsub.subscribe(get_execution_channel(request_id))
+
+        version = await get_execution_view_version(model, request_id)
+        while version == since:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=remaining
+            )
+            if message is not None:
+                version = await get_execution_view_version(model, request_id)
+
+        return version
+    except (RedisError, asyncio.TimeoutError) as error:
+        logger.warning(f"Unable to wait for changes of {request_id}: {error}")
+        return await get_execution_view_version(model, request_id)
+    finally:
+        await pubsub.aclose()
@@ -41,6 +41,12 @@ class ImageStatus(StrEnum):
     failed = "failed"
 
 
+class ImagePullPolicy(StrEnum):
+    always = "always"
+    if_not_present = "if_not_present"
+    if_digest_changed = "if_digest_changed"
+
+
 class TaskStatus(StrEnum):
     queued = "queued"
     executing = "executing"
@@ -49,6 +55,11 @@ class TaskStatus(StrEnum):
     cancelled = "cancelled"
 
 
+class BlobReference(BaseModel):
+    digest: str = Field(description="The sha256 digest of the blob content.")
+    size: int = Field(description="The uncompressed size of the blob in bytes.")
+
+
 class DatabaseExecutionResult(BaseModel):
     test_case_id: str
     std_in: str | None = Field(default=None)
@@ -56,6 +67,11 @@ class DatabaseExecutionResult(BaseModel):
     expended_time: PositiveFloat
     std_out: str | None = Field(default=None)
     std_err: str | None = Field(default=None)
+
+    # large outputs are moved to the blob store, `std_out` / `std_err` then
+    # only hold the start of the output.
+    std_out_blob: BlobReference | None = Field(default=None)
+    std_err_blob: BlobReference | None = Field(default=None)
     state: Literal[
         "success",
         "failed",
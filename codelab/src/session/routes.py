@@ -1,7 +1,8 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, File, Path, UploadFile, status
+from fastapi import APIRouter, Depends, File, Path, Response, UploadFile, status
 from uuid import UUID
 
+from src.core.responses import ResponseSerializer
 from src.session.services.session_creation import (
     get_session_by_id_service,
     get_session_in_creation_state_service,
@@ -25,6 +26,11 @@ from src.models import Session as WorkflowSession
 
 router = APIRouter()
 
+# session details carry every exercise and test case, they are serialized
+# directly instead of going through FastAPI's validation and encoding.
+session_creation_serializer = ResponseSerializer(SessionCreationSchema)
+session_serializer = ResponseSerializer(WorkflowSession)
+
 
 @router.post(
     "/initialize",
@@ -36,9 +42,11 @@ async def initialize_session(
         SessionCreationSchema, 
         Depends(initialize_session_state_service)
     ]
-):
+) -> Response:
     """Initialize a new session."""
-    return session_data
+    return session_creation_serializer.response(
+        session_data, status_code=status.HTTP_201_CREATED
+    )
 
 
 @router.post(
@@ -51,9 +59,9 @@ async def configure_content(
         SessionCreationSchema, 
         Depends(configure_session_content_service)
     ]
-):
+) -> Response:
     """Configure the content of a session."""
-    return session_data
+    return session_creation_serializer.response(session_data)
 
 
 @router.post(
@@ -66,9 +74,9 @@ async def configure_resources(
         SessionCreationSchema, 
         Depends(configure_session_resource_service)
     ]
-):
+) -> Response:
     """Configure the resources of a session."""
-    return session_data
+    return session_creation_serializer.response(session_data)
 
 
 @router.post(
@@ -81,9 +89,9 @@ async def configure_collaboration(
         SessionCreationSchema, 
         Depends(configure_session_collaboration_service)
     ]
-):
+) -> Response:
     """Configure the collaboration settings of a session."""
-    return session_data
+    return session_creation_serializer.response(session_data)
 
 
 @router.post(
@@ -96,9 +104,9 @@ async def configure_enrollment(
         SessionCreationSchema, 
         Depends(configure_session_enrollment_service)
     ]
-):
+) -> Response:
     """Configure the enrollment settings of a session."""
-    return session_data
+    return session_creation_serializer.response(session_data)
 
 
 @router.post(
@@ -111,6 +119,6 @@ async def confirm_session(
         WorkflowSession, 
         Depends(confirm_session_creation_service)
     ]
-):
+) -> Response:
     """Confirm the creation of a session."""
-    return session
+    return session_serializer.response(session)
@@ -134,12 +134,14 @@ class SessionContentConfigurationSchema(BaseModel):
 
 
 class EvaluationFlagCreationSchema(BaseModel):
+    id: UUID | None = Field(default=None, description="ID of an existing evaluation flag to update.")
     flag: EvaluationFlag | str
     visible: bool
     score_percentage: PositiveFloat = Field(ge=0, le=100, default=100)
 
 
 class TestCaseCreationSchema(BaseModel):
+    id: UUID | None = Field(default=None, description="ID of an existing test case to update.")
     title: str
     visible: bool
     test_input: str
@@ -148,6 +150,7 @@ class TestCaseCreationSchema(BaseModel):
 
 
 class ExerciseCreationSchema(BaseModel):
+    id: UUID | None = Field(default=None, description="ID of an existing exercise to update.")
     question: str 
     instructions: str
     score_percentage: PositiveFloat = Field(ge=0, le=100, default=100)
@@ -1,38 +1,42 @@
+import codecs
 import csv
+import itertools
 import secrets
+from collections.abc import Iterable, Iterator
 from datetime import timedelta
-from typing import Annotated
-from uuid import UUID
+from typing import Annotated, Any
+from uuid import UUID, uuid4
 from fastapi import Depends, Body, File, Path, UploadFile, status
 from src.core.dependecies import require_db_session, require_admin
-from sqlmodel import Session, select
+from sqlmodel import SQLModel, col, delete, insert, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from src.core.exceptions import APIException
 from src.core.schemas import APIErrorCodes
-from pydantic import EmailStr, ValidationError
+from pydantic import EmailStr, TypeAdapter, ValidationError
 from src.core.config import settings
 from src.models import (
     Admin,
-    SessionEnrollment, 
+    SessionEnrollment,
     Student,
-    Exercise, 
-    ExerciseEvaluationFlag, 
-    LanguageImage, 
-    Session as WorkflowSession, 
-    SessionReasourceConfig, 
+    Exercise,
+    ExerciseEvaluationFlag,
+    LanguageImage,
+    Session as WorkflowSession,
+    SessionReasourceConfig,
     TestCase,
 )
 from src.schemas import (
-    ImageStatus, 
-    SessionEnrollmentMethod, 
-    SessionInitializationStage, 
+    ImageStatus,
+    SessionEnrollmentMethod,
+    SessionInitializationStage,
     SessionStatus,
 )
 from src.session.schemas import (
     SessionCollaborationSchema,
-    SessionContentConfigurationSchema, 
-    SessionCreationDetailSchema, 
+    SessionContentConfigurationSchema,
+    SessionCreationDetailSchema,
     SessionCreationSchema,
-    SessionEnrollmentSchema, 
+    SessionEnrollmentSchema,
     SessionInitializationSchema,
     SessionResourceConfigurationSchema,
 )
@@ -48,12 +52,12 @@ from src.session.schemas import (
 # ------------------------------------------------------------
 
 
-def get_session_by_id_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def get_session_by_id_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     session_id: Annotated[UUID, Path()],
 ) -> WorkflowSession:
     """Get a session by its id."""
-    session = db_session.get(WorkflowSession, session_id)
+    session = await db_session.get(WorkflowSession, session_id)
 
     if not session:
         raise APIException(
@@ -64,7 +68,7 @@ def get_session_by_id_service(
     return session
 
 
-def get_session_in_creation_state_service(
+async def get_session_in_creation_state_service(
     admin: Annotated[Admin, Depends(require_admin)],
     session: Annotated[WorkflowSession, Depends(get_session_by_id_service)],
 ) -> WorkflowSession:
@@ -88,16 +92,16 @@ def get_session_in_creation_state_service(
     return session
 
 
-def initialize_session_state_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def initialize_session_state_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     session_data: Annotated[SessionInitializationSchema, Body()],
 ) -> SessionCreationSchema:
     """Initialize the creation of a new session."""
 
     # check that language image exists and is available
-    language_image = db_session.get(
-        LanguageImage, 
+    language_image = await db_session.get(
+        LanguageImage,
         session_data.language_image_id,
     )
 
@@ -115,14 +119,14 @@ def initialize_session_state_service(
             error_code=APIErrorCodes.BAD_REQUEST,
         )
 
-    session = Session(
+    session = WorkflowSession(
         admin_id=admin.id,
         title=session_data.title,
         description=session_data.description,
         language_image_id=session_data.language_image_id,
         start_time=session_data.session_start_time,
         end_time=(
-            session_data.session_end_time 
+            session_data.session_end_time
             if session_data.session_end_time else
             session_data.session_start_time + timedelta(hours=session_data.session_duration)
         ),
@@ -130,7 +134,7 @@ def initialize_session_state_service(
     )
 
     db_session.add(session)
-    db_session.commit()
+    await db_session.commit()
 
     return SessionCreationSchema(
         stage=SessionInitializationStage.content_configuration,
@@ -138,75 +142,162 @@ def initialize_session_state_service(
     )
 
 
-def configure_session_content_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def _load_rows(
+    db_session: AsyncSession,
+    model: type[SQLModel],
+    columns: list[str],
+    *where: Any,
+) -> dict[UUID, dict[str, Any]]:
+    """Load the given columns of the matching rows of model keyed by id."""
+
+    table_columns = model.__table__.columns  # type: ignore
+    rows = (await db_session.exec(
+        select(*[table_columns[column] for column in columns]).where(*where)
+    )).all()
+
+    return {row.id: dict(row._mapping) for row in rows}
+
+
+def _resolve_row_id(
+    model: type[SQLModel],
+    row_id: UUID | None,
+    existing_rows: dict[UUID, dict[str, Any]],
+) -> UUID:
+    """Get the id of a submitted row, new rows are given an id up front."""
+
+    if row_id is None:
+        return uuid4()
+
+    # only rows that belong to this session can be updated
+    if row_id not in existing_rows:
+        raise APIException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            message=f"{model.__name__} {row_id} not found in this session.",
+            error_code=APIErrorCodes.NOT_FOUND,
+        )
+
+    return row_id
+
+
+def _diff_rows(
+    existing_rows: dict[UUID, dict[str, Any]],
+    rows: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], set[UUID]]:
+    """
+    Compare submitted rows with the existing rows.
+
+    Returns the rows to insert, the rows whose values changed and the ids of
+    the existing rows that were not submitted.
+    """
+
+    inserts = [row for row in rows if row["id"] not in existing_rows]
+    updates = [
+        row for row in rows
+        if row["id"] in existing_rows and row != existing_rows[row["id"]]
+    ]
+    deleted_ids = existing_rows.keys() - {row["id"] for row in rows}
+
+    return inserts, updates, deleted_ids
+
+
+async def configure_session_content_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     session: Annotated[WorkflowSession, Depends(get_session_in_creation_state_service)],
     session_data: Annotated[SessionContentConfigurationSchema, Body()],
 ) -> SessionCreationSchema:
     """Configure the content of the session."""
-    
-    # before adding new content delete existing content
-    # This is to avoid having dublicate content and it allows the user the
-    # optiion of going back and editing the content.
-
-    db_session.exec(
-        select(ExerciseEvaluationFlag).where(ExerciseEvaluationFlag.exercise_id.in_(
-            select(Exercise.id).where(Exercise.session_id == session.id)
-        ))
-    ).delete()
-    db_session.exec(
-        select(Exercise).where(Exercise.session_id == session.id)
-    ).delete()
-    db_session.exec(
-        select(TestCase).where(TestCase.exercise_id.in_(
-            select(Exercise.id).where(Exercise.session_id == session.id)
-        ))
-    ).delete()
-
-    # create exercises, evaluation flags and test cases
-    exercises_to_create = []
-    evaluation_flags_to_create = []
-    test_cases_to_create = []
+
+    # the content is saved as a diff against the existing content. This allows
+    # the user the option of going back and editing the content: items sent
+    # with an id are updated if they changed, items without one are created
+    # and existing items that were not sent are deleted.
+
+    session_exercise_ids = select(Exercise.id).where(Exercise.session_id == session.id)
+
+    exercise_columns = ["id", "session_id", "question", "instructions", "score_percentage"]
+    test_case_columns = [
+        "id",
+        "exercise_id",
+        "title",
+        "visible",
+        "test_input",
+        "expected_output",
+        "score_percentage",
+    ]
+    evaluation_flag_columns = ["id", "exercise_id", "flag", "visible", "score_percentage"]
+
+    existing_exercises = await _load_rows(
+        db_session,
+        Exercise,
+        exercise_columns,
+        col(Exercise.session_id) == session.id,
+    )
+    existing_test_cases = await _load_rows(
+        db_session,
+        TestCase,
+        test_case_columns,
+        col(TestCase.exercise_id).in_(session_exercise_ids),
+    )
+    existing_evaluation_flags = await _load_rows(
+        db_session,
+        ExerciseEvaluationFlag,
+        evaluation_flag_columns,
+        col(ExerciseEvaluationFlag.exercise_id).in_(session_exercise_ids),
+    )
+
+    # flatten the submitted content into rows
+    exercise_rows, test_case_rows, evaluation_flag_rows = [], [], []
 
     for exercise_data in session_data.exercises:
-        exercise = Exercise(
-            session_id=session.id,
-            question=exercise_data.question,
-            instructions=exercise_data.instructions,
-            score_percentage=exercise_data.score_percentage,
-        )
-        exercises_to_create.append(exercise)
+        exercise_id = _resolve_row_id(Exercise, exercise_data.id, existing_exercises)
+        exercise_rows.append({
+            **exercise_data.model_dump(include=set(exercise_columns)),
+            "id": exercise_id,
+            "session_id": session.id,
+        })
 
         for test_case_data in exercise_data.test_cases:
-            test_case = TestCase(
-                exercise_id=exercise.id,
-                title=test_case_data.title,
-                visible=test_case_data.visible,
-                test_input=test_case_data.test_input,
-                expected_output=test_case_data.expected_output,
-                score_percentage=test_case_data.score_percentage,
-            )
-            test_cases_to_create.append(test_case)
+            test_case_rows.append({
+                **test_case_data.model_dump(include=set(test_case_columns)),
+                "id": _resolve_row_id(TestCase, test_case_data.id, existing_test_cases),
+                "exercise_id": exercise_id,
+            })
 
         for evaluation_flag_data in exercise_data.evaluation_flags:
-            evaluation_flag = ExerciseEvaluationFlag(
-                exercise_id=exercise.id,
-                flag=evaluation_flag_data.flag,
-                visible=evaluation_flag_data.visible,
-                score_percentage=evaluation_flag_data.score_percentage,
-            )
-            evaluation_flags_to_create.append(evaluation_flag)
-
-    # commit the changes
-    db_session.add_all(exercises_to_create)
-    db_session.add_all(test_cases_to_create)
-    db_session.add_all(evaluation_flags_to_create)
+            evaluation_flag_rows.append({
+                **evaluation_flag_data.model_dump(include=set(evaluation_flag_columns)),
+                "id": _resolve_row_id(
+                    ExerciseEvaluationFlag,
+                    evaluation_flag_data.id,
+                    existing_evaluation_flags,
+                ),
+                "exercise_id": exercise_id,
+            })
+
+    changes = [
+        (ExerciseEvaluationFlag, _diff_rows(existing_evaluation_flags, evaluation_flag_rows)),
+        (TestCase, _diff_rows(existing_test_cases, test_case_rows)),
+        (Exercise, _diff_rows(existing_exercises, exercise_rows)),
+    ]
+
+    # delete test cases and flags before their exercises, then write exercises
+    # before the test cases and flags that reference them.
+    for model, (_, _, deleted_ids) in changes:
+        if deleted_ids:
+            await db_session.exec(delete(model).where(col(model.id).in_(deleted_ids)))
+
+    for model, (inserts, updates, _) in reversed(changes):
+        if inserts:
+            await db_session.exec(insert(model), params=inserts)
+        if updates:
+            # bulk update by primary key, executed as a single executemany
+            await db_session.exec(update(model), params=updates)
 
     # update session initialization stage
     session.initialization_stage = SessionInitializationStage.resource_configuration
     db_session.add(session)
-    db_session.commit()
+    await db_session.commit()
 
     return SessionCreationSchema(
         stage=session.initialization_stage,
@@ -214,29 +305,31 @@ def configure_session_content_service(
     )
 
 
-def configure_session_resource_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def configure_session_resource_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     session: Annotated[WorkflowSession, Depends(get_session_in_creation_state_service)],
     session_data: Annotated[SessionResourceConfigurationSchema, Body()],
 ) -> SessionCreationSchema:
     """Configure the resource of the session."""
-    
+
     # delete previous reasource configuration
-    db_session.exec(
-        select(SessionReasourceConfig).where(SessionReasourceConfig.session_id == session.id)
-    ).delete()
+    await db_session.exec(
+        delete(SessionReasourceConfig)
+        .where(col(SessionReasourceConfig.session_id) == session.id)
+    )
 
     # create new reasource configuration
     reasource_configuration = SessionReasourceConfig(
         session_id=session.id,
         **session_data.model_dump(),
     )
+    db_session.add(reasource_configuration)
 
     # update session initialization stage
     session.initialization_stage = SessionInitializationStage.collaboration_configuration
     db_session.add(session)
-    db_session.commit()
+    await db_session.commit()
 
     return SessionCreationSchema(
         stage=session.initialization_stage,
@@ -244,8 +337,8 @@ def configure_session_resource_service(
     )
 
 
-def configure_session_collaboration_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def configure_session_collaboration_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     session: Annotated[WorkflowSession, Depends(get_session_in_creation_state_service)],
     session_data: Annotated[SessionCollaborationSchema, Body()],
@@ -257,7 +350,7 @@ def configure_session_collaboration_service(
     # update session initialization stage
     session.initialization_stage = SessionInitializationStage.enrollment_configuration
     db_session.add(session)
-    db_session.commit()
+    await db_session.commit()
 
     return SessionCreationSchema(
         stage=session.initialization_stage,
@@ -265,45 +358,112 @@ def configure_session_collaboration_service(
     )
 
 
+_email_adapter: TypeAdapter[str] = TypeAdapter(EmailStr)
+
+
 def _extract_enrollment_data_from_csv(
     csv_file: UploadFile,
-) -> list[EmailStr]:
-    """Extract the enrollment data from the CSV file.
+) -> Iterator[str]:
+    """Stream the enrollment emails from the CSV file.
 
     Validates that the CSV has a header 'email' and each row contains a valid email.
+    Rows are decoded and validated as they are read, so the whole upload is never
+    held in memory and errors are raised when the invalid row is reached.
     """
 
     csv_file.file.seek(0)
-    csv_reader = csv.DictReader(csv_file.file)
-    if 'email' not in csv_reader.fieldnames:
+    csv_reader = csv.DictReader(codecs.iterdecode(csv_file.file, "utf-8-sig"))
+    if not csv_reader.fieldnames or 'email' not in csv_reader.fieldnames:
         raise ValueError("CSV file must contain a header named 'email'.")
 
-    enrollment_data = []
     for i, row in enumerate(csv_reader, start=1):  # start=1 to account for header row
-        email = row.get('email', '').strip()
+        email = (row.get('email') or '').strip()
         if not email:
             raise ValueError(f"Missing email in row {i}.")
         try:
-            validated_email = EmailStr(email)
+            yield _email_adapter.validate_python(email)
         except ValidationError:
             raise ValueError(f"Invalid email '{email}' in row {i}.")
-        enrollment_data.append(validated_email)
 
-    return enrollment_data
 
+def _chunked(values: Iterable[str], size: int) -> Iterator[list[str]]:
+    """Split values into lists of at most size values."""
+
+    iterator = iter(values)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+async def _enroll_students(
+    db_session: AsyncSession,
+    session: WorkflowSession,
+    emails: Iterable[str],
+) -> None:
+    """Enroll the students with the given emails in the session.
+
+    Emails are processed in chunks, existing students and enrollments in a chunk
+    are resolved with one `IN` query each and the missing rows are created with
+    bulk inserts. Nothing is committed so the import runs in the caller's transaction.
+    """
 
-def configure_session_enrollment_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+    seen_emails: set[str] = set()
+
+    for chunk in _chunked(emails, settings.ENROLLMENT_IMPORT_CHUNK_SIZE):
+        chunk_emails = [email for email in dict.fromkeys(chunk) if email not in seen_emails]
+        seen_emails.update(chunk_emails)
+        if not chunk_emails:
+            continue
+
+        student_ids = dict((await db_session.exec(
+            select(Student.email, Student.id).where(col(Student.email).in_(chunk_emails))
+        )).all())
+
+        # create the students that do not exist yet
+        new_students = [
+            {"id": uuid4(), "email": email}
+            for email in chunk_emails
+            if email not in student_ids
+        ]
+        if new_students:
+            await db_session.exec(insert(Student), params=new_students)
+            student_ids.update((student["email"], student["id"]) for student in new_students)
+
+        # skip students already enrolled e.g when the enrollment is configured again
+        enrolled_student_ids = set((await db_session.exec(
+            select(SessionEnrollment.student_id).where(
+                col(SessionEnrollment.session_id) == session.id,
+                col(SessionEnrollment.student_id).in_(student_ids.values()),
+            )
+        )).all())
+
+        new_enrollments = [
+            {
+                "id": uuid4(),
+                "session_id": session.id,
+                "student_id": student_id,
+                "email": email,
+            }
+            for email, student_id in student_ids.items()
+            if student_id not in enrolled_student_ids
+        ]
+        if new_enrollments:
+            await db_session.exec(insert(SessionEnrollment), params=new_enrollments)
+
+
+async def configure_session_enrollment_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     session: Annotated[WorkflowSession, Depends(get_session_in_creation_state_service)],
     session_data: Annotated[SessionEnrollmentSchema, Body()],
     csv_file: Annotated[
-        UploadFile | None, 
+        UploadFile | None,
         File(description="The CSV file containing the enrollment data.",),
     ],
 ) -> SessionCreationSchema:
     """Configure the enrollment of the session."""
 
+    emails: Iterable[str] = session_data.manual_invite_emails or []
+
     if session_data.enrollment_method == SessionEnrollmentMethod.bulk_upload:
         if csv_file is None:
             raise APIException(
@@ -312,60 +472,26 @@ def configure_session_enrollment_service(
                 error_code=APIErrorCodes.INVALID_ENROLLMENT_DATA,
             )
 
-        try:
-            # extract the enrollment data from the csv file
-            enrollment_data = _extract_enrollment_data_from_csv(csv_file)
-        except ValueError as error:
-            raise APIException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                message="Invalid enrollment data. Ensure csv matches the required format.",
-                error_code=APIErrorCodes.INVALID_ENROLLMENT_DATA,
-                detail={"reason": str(error)},
-            ) from error
+        emails = itertools.chain(_extract_enrollment_data_from_csv(csv_file), emails)
 
+    try:
         # create student and session enrollment records from each email
-        for email in set(enrollment_data):
-            # first check if student already exists
-            student = db_session.exec(
-                select(Student).where(Student.email == email)
-            ).first()
-
-            if not student:
-                # create new student
-                student = Student(email=email)
-                db_session.add(student)
-
-            # create session enrollment record
-            session_enrollment = SessionEnrollment(
-                session_id=session.id,
-                student_id=student.id,
-            )
-            db_session.add(session_enrollment)
-
-    if session_data.manual_invite_emails:
-        for email in set(session_data.manual_invite_emails):
-            # first check if student already exists
-            student = db_session.exec(
-                select(Student).where(Student.email == email)
-            ).first()
-
-            if not student:
-                # create new student
-                student = Student(email=email)
-                db_session.add(student)
-
-            # create session enrollment record
-            session_enrollment = SessionEnrollment(
-                session_id=session.id,
-                student_id=student.id,
-            )
-            db_session.add(session_enrollment)
+        await _enroll_students(db_session, session, emails)
+    except ValueError as error:
+        # the csv is streamed, so discard the rows enrolled before the invalid one
+        await db_session.rollback()
+        raise APIException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            message="Invalid enrollment data. Ensure csv matches the required format.",
+            error_code=APIErrorCodes.INVALID_ENROLLMENT_DATA,
+            detail={"reason": str(error)},
+        ) from error
 
     # update session initialization stage and enrollment id
     session.enrollment_id = secrets.token_urlsafe(10)
     session.initialization_stage = SessionInitializationStage.confirmation
     db_session.add(session)
-    db_session.commit()
+    await db_session.commit()
 
     return SessionCreationSchema(
         stage=session.initialization_stage,
@@ -373,13 +499,13 @@ def configure_session_enrollment_service(
     )
 
 
-def confirm_session_creation_service(
-    db_session: Annotated[Session, Depends(require_db_session)],
+async def confirm_session_creation_service(
+    db_session: Annotated[AsyncSession, Depends(require_db_session)],
     admin: Annotated[Admin, Depends(require_admin)],
     session: Annotated[WorkflowSession, Depends(get_session_in_creation_state_service)],
 ) -> WorkflowSession:
     """Confirm the creation of the session."""
-    
+
     # check that session is in confirmation stage
     if session.initialization_stage != SessionInitializationStage.confirmation:
         raise APIException(
@@ -387,11 +513,11 @@ def confirm_session_creation_service(
             message="Session is not in confirmation stage.",
             error_code=APIErrorCodes.BAD_REQUEST,
         )
-    
+
     # mark session as created
     session.status = SessionStatus.created
     db_session.add(session)
-    db_session.commit()
+    await db_session.commit()
 
     # TODO: Trigger session created lifecycle event, here to notify other VPL services
     return session
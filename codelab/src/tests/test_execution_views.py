@@ -0,0 +1,156 @@
+import asyncio
+import uuid
+from unittest import TestCase
+from unittest.mock import AsyncMock, Mock, call, patch
+
+import fakeredis
+from fastapi import status
+
+from src.core.exceptions import APIException
+from src.models import Admin, Student, Task
+from src.sandbox import services, views
+from src.sandbox.services import _authorize_cached_view, get_task_view_service
+from src.sandbox.views import CachedExecutionView
+
+
+class AuthorizeCachedViewTestCase(TestCase):
+    def setUp(self) -> None:
+        # the checks only compare ids, the users are not persisted
+        self.student = Mock(spec=Student, id=uuid.uuid4())
+        self.admin = Mock(spec=Admin, id=uuid.uuid4())
+        self.cached = CachedExecutionView(
+            view="{}",
+            session_id=uuid.uuid4(),
+            session_admin_id=self.admin.id,
+            student_id=self.student.id,
+        )
+
+    def _assert_not_found(self, user: Student | Admin) -> None:
+        with self.assertRaises(APIException) as context:
+            _authorize_cached_view(self.cached, user, "Task not found.")
+
+        self.assertEqual(context.exception.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_allows_the_owning_student(self) -> None:
+        _authorize_cached_view(self.cached, self.student, "Task not found.")
+
+    def test_allows_the_session_admin(self) -> None:
+        _authorize_cached_view(self.cached, self.admin, "Task not found.")
+
+    def test_rejects_other_students(self) -> None:
+        self._assert_not_found(Mock(spec=Student, id=uuid.uuid4()))
+
+    def test_rejects_other_admins(self) -> None:
+        self._assert_not_found(Mock(spec=Admin, id=uuid.uuid4()))
+
+    def test_rejects_students_on_views_without_a_student(self) -> None:
+        self.cached.student_id = None
+        self._assert_not_found(self.student)
+
+
+class GetCachedExecutionViewTestCase(TestCase):
+    def setUp(self) -> None:
+        server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=server)
+        for name, client in (
+            ("get_redis_client", self.redis),
+            ("get_async_redis_client", fakeredis.FakeAsyncRedis(server=server)),
+        ):
+            patcher = patch.object(views, name, return_value=client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.session_id = uuid.uuid4()
+        self.task_id = uuid.uuid4()
+        self.redis.hset(
+            views._get_view_key(Task, self.task_id),
+            mapping={
+                "view": "{}",
+                "session_id": str(self.session_id),
+                "session_admin_id": str(uuid.uuid4()),
+                "student_id": "",
+            },
+        )
+
+    def _get(self, session_id: uuid.UUID) -> CachedExecutionView | None:
+        return asyncio.run(
+            views.get_cached_execution_view(Task, self.task_id, session_id)
+        )
+
+    def test_returns_the_view_of_the_session(self) -> None:
+        cached = self._get(self.session_id)
+
+        assert cached is not None
+        self.assertEqual(cached.view, "{}")
+        self.assertIsNone(cached.student_id)
+
+    def test_misses_views_of_other_sessions(self) -> None:
+        self.assertIsNone(self._get(uuid.uuid4()))
+
+    def test_misses_views_of_ended_sessions(self) -> None:
+        views.invalidate_session_execution_views(self.session_id)
+
+        self.assertIsNone(self._get(self.session_id))
+
+
+class GetTaskViewServiceTestCase(TestCase):
+    def setUp(self) -> None:
+        # records the calls of the db session and the view helpers in order
+        self.calls = Mock()
+        self.calls.get_execution_view_version = AsyncMock(return_value=1)
+        self.calls.get_task_view = AsyncMock(side_effect=["first", "second"])
+        self.calls.wait_for_execution_view_change = AsyncMock(return_value=2)
+        self.calls.db_session.close = AsyncMock()
+
+        for name, mock in (
+            ("get_execution_view_version", self.calls.get_execution_view_version),
+            ("_get_task_view", self.calls.get_task_view),
+            (
+                "wait_for_execution_view_change",
+                self.calls.wait_for_execution_view_change,
+            ),
+        ):
+            patcher = patch.object(services, name, mock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.user = Mock(spec=Student, id=uuid.uuid4())
+        self.session_id = uuid.uuid4()
+        self.task_id = uuid.uuid4()
+
+    def _get(self, since: int) -> views.ExecutionView:
+        return asyncio.run(
+            get_task_view_service(
+                self.calls.db_session,
+                self.user,
+                self.session_id,
+                self.task_id,
+                wait=5,
+                since=since,
+            )
+        )
+
+    def test_releases_the_db_session_before_waiting(self) -> None:
+        view = self._get(since=1)
+
+        self.assertEqual(view, views.ExecutionView(content="second", version=2))
+        get_view = call.get_task_view(
+            self.calls.db_session, self.user, self.session_id, self.task_id
+        )
+        self.assertEqual(
+            self.calls.mock_calls,
+            [
+                call.get_execution_view_version(Task, self.task_id),
+                get_view,
+                call.db_session.close(),
+                call.wait_for_execution_view_change(Task, self.task_id, 1, 5),
+                get_view,
+            ],
+        )
+
+    def test_does_not_wait_for_a_changed_version(self) -> None:
+        view = self._get(since=0)
+
+        self.assertEqual(view, views.ExecutionView(content="first", version=1))
+        self.calls.db_session.close.assert_not_called()
+        self.calls.wait_for_execution_view_change.assert_not_called()
@@ -0,0 +1,52 @@
+import time
+import uuid
+from unittest import TestCase
+from unittest.mock import patch
+
+import fakeredis
+
+from src.core.config import settings
+from src.sandbox import locks
+
+
+class ImageLockTestCase(TestCase):
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeRedis()
+        for patcher in (
+            patch.object(locks, "get_redis_client", return_value=self.redis),
+            # renewed every 0.1s
+            patch.object(settings, "IMAGE_BUILD_LOCK_TIMEOUT_SECONDS", 0.3),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.image_id = uuid.uuid4()
+
+    def test_is_held_past_its_timeout(self) -> None:
+        with locks.image_lock(self.image_id):
+            time.sleep(1)
+
+            self.assertTrue(locks.is_image_locked(self.image_id))
+            with self.assertRaises(locks.ImageBuildLockedError):
+                with locks.image_lock(self.image_id):
+                    pass
+
+        self.assertFalse(locks.is_image_locked(self.image_id))
+
+    def test_releasing_an_expired_lock_does_not_raise(self) -> None:
+        with locks.image_lock(self.image_id):
+            self.redis.delete(f"{locks.IMAGE_BUILD_LOCK_PREFIX}:{self.image_id}")
+
+        self.assertFalse(locks.is_image_locked(self.image_id))
+
+    def test_build_slots_are_limited(self) -> None:
+        with patch.object(settings, "MAX_CONCURRENT_IMAGE_BUILDS", 1):
+            with locks.image_build_slot():
+                time.sleep(0.5)
+
+                with self.assertRaises(locks.BuildSlotUnavailableError):
+                    with locks.image_build_slot():
+                        pass
+
+            with locks.image_build_slot():
+                pass
@@ -0,0 +1,75 @@
+import asyncio
+import uuid
+from unittest import TestCase
+from unittest.mock import AsyncMock, patch
+
+import fakeredis
+from fastapi import status
+
+from src.core.exceptions import APIException
+from src.core.rate_limit import TokenBucketLimiter
+from src.core.schemas import UserKeyClaims
+from src.sandbox.services import _enforce_execution_rate_limit
+
+
+class TokenBucketLimiterTestCase(TestCase):
+    def setUp(self) -> None:
+        self.redis = fakeredis.FakeAsyncRedis()
+        patcher = patch(
+            "src.core.rate_limit.get_async_redis_client", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_takes_tokens_until_the_bucket_is_empty(self) -> None:
+        limiter = TokenBucketLimiter("test", capacity=3, refill_per_second=0.5)
+
+        retry_afters = [asyncio.run(limiter.acquire("key")) for _ in range(4)]
+
+        self.assertEqual(retry_afters[:3], [0, 0, 0])
+        # one token is missing and 0.5 tokens are refilled per second
+        self.assertAlmostEqual(retry_afters[3], 2, delta=0.1)
+
+    def test_buckets_are_kept_per_key(self) -> None:
+        limiter = TokenBucketLimiter("test", capacity=1, refill_per_second=0.5)
+
+        self.assertEqual(asyncio.run(limiter.acquire("first")), 0)
+        self.assertGreater(asyncio.run(limiter.acquire("first")), 0)
+        self.assertEqual(asyncio.run(limiter.acquire("second")), 0)
+
+    def test_fails_open_when_redis_is_unavailable(self) -> None:
+        server = fakeredis.FakeServer()
+        server.connected = False
+        limiter = TokenBucketLimiter("test", capacity=1, refill_per_second=0.5)
+
+        with patch(
+            "src.core.rate_limit.get_async_redis_client",
+            return_value=fakeredis.FakeAsyncRedis(server=server),
+        ):
+            retry_afters = [asyncio.run(limiter.acquire("key")) for _ in range(2)]
+
+        self.assertEqual(retry_afters, [0, 0])
+
+
+class EnforceExecutionRateLimitTestCase(TestCase):
+    def _enforce(self, retry_after: float) -> None:
+        limiter = AsyncMock(spec=TokenBucketLimiter)
+        limiter.acquire.return_value = retry_after
+        asyncio.run(
+            _enforce_execution_rate_limit(
+                limiter, UserKeyClaims(user_id=uuid.uuid4()), uuid.uuid4()
+            )
+        )
+
+    def test_allows_requests_with_a_token(self) -> None:
+        self._enforce(0)
+
+    def test_rounds_retry_after_up(self) -> None:
+        for retry_after, header in ((0.2, "1"), (1.0, "1"), (1.5, "2")):
+            with self.assertRaises(APIException) as context:
+                self._enforce(retry_after)
+
+            self.assertEqual(
+                context.exception.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            self.assertEqual(context.exception.headers, {"Retry-After": header})
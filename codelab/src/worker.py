@@ -1,8 +1,9 @@
 from celery import Celery, Task
 from celery.schedules import crontab
-from celery.signals import task_postrun, task_prerun
+from celery.signals import task_postrun, task_prerun, worker_ready, worker_shutdown
 
 from src.core.config import settings
+from src.core.health import WorkerHeartbeat
 from src.log import logger as main_logger
 
 celery_app = Celery(
@@ -13,6 +14,13 @@ celery_app.conf.result_backend = settings.CELERY_RESULT_BACKEND
 celery_app.conf.task_default_queue = settings.CELERY_DEFAULT_QUEUE
 celery_app.conf.broker_connection_retry_on_startup = True
 
+# the api sends tasks by name without importing them, so queues set on the
+# task decorators would not apply. Route them here for both.
+EXECUTION_QUEUE_TASKS = ("build_language_image_task", "program_execution_queue")
+celery_app.conf.task_routes = {
+    name: {"queue": settings.CELERY_EXECUTION_QUEUE} for name in EXECUTION_QUEUE_TASKS
+}
+
 
 @task_prerun.connect
 def _log_task_before_run(task_id: str, task: Task, *args, **kwargs) -> None:  # type: ignore  # noqa
@@ -26,6 +34,24 @@ def _log_task_after_run(task_id: str, task: Task, *args, **kwargs) -> None:  # t
     main_logger.info(f"Task {task.name} finished")
 
 
+_worker_heartbeat: WorkerHeartbeat | None = None
+
+
+@worker_ready.connect
+def _start_worker_heartbeat(sender, **kwargs) -> None:  # type: ignore  # noqa
+    """Start publishing the liveness of the worker for the health check."""
+    global _worker_heartbeat
+    _worker_heartbeat = WorkerHeartbeat(sender.hostname)
+    _worker_heartbeat.start()
+
+
+@worker_shutdown.connect
+def _stop_worker_heartbeat(*args, **kwargs) -> None:  # type: ignore  # noqa
+    """Stop publishing the liveness of the worker."""
+    if _worker_heartbeat is not None:
+        _worker_heartbeat.stop()
+
+
 celery_app.conf.beat_schedule = {
     "cleanup_handing_builds_tasks": {
         "task": "cleanup_handing_builds_tasks",
@@ -35,4 +61,8 @@ celery_app.conf.beat_schedule = {
         "task": "execute_scheduled_build_actions_task",
         "schedule": crontab(minute="*/5"),  # Runs every minutes
     },
+    "collect_unused_language_images_task": {
+        "task": "collect_unused_language_images_task",
+        "schedule": crontab(minute=0),  # Runs every hour
+    },
 }